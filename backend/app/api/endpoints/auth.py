@@ -28,7 +28,7 @@ async def register(user_data: UserRegister):
     
     # Create new user
     user_id = str(uuid.uuid4())
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     
     new_user = {
         "id": user_id,
@@ -71,11 +71,16 @@ async def login(credentials: UserLogin):
         )
     
     # Verify password
-    if not verify_password(credentials.password, user["hashed_password"]):
+    verified, new_hash = await verify_password(credentials.password, user["hashed_password"])
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
+
+    # Re-hash with the configured cost factor if AUTH_BCRYPT_ROUNDS changed
+    if new_hash:
+        await db.db.users.update_one({"id": user["id"]}, {"$set": {"hashed_password": new_hash}})
     
     # Check if user is active
     if not user.get("is_active", True):
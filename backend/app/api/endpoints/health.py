@@ -1,25 +1,31 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from app.core.database import db
+from app.core.readiness import readiness
 import os
 from datetime import datetime
+from loguru import logger
 
 router = APIRouter()
 
 @router.get("/")
 async def health_check():
-    """Basic health check endpoint"""
+    """Liveness: the process is up and serving, even while components are still warming up"""
     mongo_status = "Connected" if db.client else "Disconnected"
     return {
         "status": "active",
         "environment": os.getenv("PROJECT_NAME", "Unknown"),
-        "database_status": mongo_status
+        "database_status": mongo_status,
+        "ready": readiness.is_ready()
     }
 
 @router.get("/status")
 async def detailed_health_check():
     """
     Detailed health check endpoint for frontend to verify backend is ready.
-    This endpoint is specifically designed to handle cold starts on Render.
+    This endpoint is specifically designed to handle cold starts on Render:
+    it returns 503 with per-component readiness until the embedder, index,
+    LLM client and MongoDB have all finished warming up.
     """
     try:
         # Check database connectivity
@@ -30,11 +36,12 @@ async def detailed_health_check():
                 await db.client.admin.command('ping')
                 mongo_connected = True
             except Exception as e:
-                print(f"MongoDB ping failed: {e}")
+                logger.error(f"MongoDB ping failed: {e}")
                 mongo_connected = False
         
-        return {
-            "status": "healthy",
+        ready = readiness.is_ready() and mongo_connected
+        body = {
+            "status": "healthy" if ready else "starting",
             "timestamp": datetime.utcnow().isoformat(),
             "database": {
                 "connected": mongo_connected,
@@ -45,8 +52,10 @@ async def detailed_health_check():
                 "version": "1.0.0",
                 "environment": os.getenv("ENVIRONMENT", "production")
             },
-            "message": "Backend is ready to accept requests"
+            "components": readiness.snapshot(),
+            "message": "Backend is ready to accept requests" if ready else "Backend is warming up"
         }
+        return JSONResponse(status_code=200 if ready else 503, content=body)
     except Exception as e:
         raise HTTPException(
             status_code=503,
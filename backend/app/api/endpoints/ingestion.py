@@ -3,26 +3,33 @@ import shutil
 from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Depends
 from typing import List
 from app.services.document_processor import DocumentProcessor
-from app.services.vector_store import VectorStoreService
+from app.services.vector_store import VectorStoreService, user_namespace
 from app.core.auth import get_current_user
+from app.core.metrics import metrics
+from loguru import logger
 
 router = APIRouter()
 processor = DocumentProcessor()
-vector_store = VectorStoreService()
 
 UPLOAD_DIR = "data/uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-async def process_file_task(file_path: str, filename: str):
+async def process_file_task(file_path: str, filename: str, namespace: str):
     try:
         metadata = {"source": filename, "type": "pdf"}
-        chunks = await processor.process_file(file_path, metadata)
+        with metrics.time("ingest_parse"):
+            chunks = await processor.process_file(file_path, metadata)
         
-        vector_store.add_documents(chunks)
-        print(f"Successfully processed {filename}: {len(chunks)} chunks added.")
+        # Singleton; already loaded by the startup warmup
+        with metrics.time("ingest_index"):
+            VectorStoreService().add_documents(chunks, namespace=namespace)
+        metrics.inc("ingested_documents_total")
+        metrics.inc("ingested_chunks_total", len(chunks))
+        logger.info(f"Successfully processed {filename}: {len(chunks)} chunks added.")
         
     except Exception as e:
-        print(f"Error background processing {filename}: {e}")
+        metrics.inc("ingestion_errors_total")
+        logger.error(f"Error background processing {filename}: {e}")
     finally:
         pass
 
@@ -33,19 +40,23 @@ async def ingest_documents(
     files: List[UploadFile] = File(...)
 ):
     saved_files = []
+    # Uploads are only searchable by their owner
+    namespace = user_namespace(current_user["user_id"])
+    upload_dir = os.path.join(UPLOAD_DIR, namespace)
+    os.makedirs(upload_dir, exist_ok=True)
     
     for file in files:
         if not file.filename.endswith(".pdf"):
             continue
             
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
+        file_path = os.path.join(upload_dir, os.path.basename(file.filename))
         try:
             with open(file_path, "wb") as buffer:
                 shutil.copyfileobj(file.file, buffer)
             
             saved_files.append(file.filename)
             # Add background task
-            background_tasks.add_task(process_file_task, file_path, file.filename)
+            background_tasks.add_task(process_file_task, file_path, file.filename, namespace)
             
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to upload {file.filename}: {str(e)}")
@@ -1,16 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from typing import Optional, Set
+import asyncio
 import uuid
 
 # Use production-ready LangChain agent as primary
-from app.services.agent import compliance_agent, AgentDeps
-from app.services.vector_store import VectorStoreService
+from app.services.agent import get_compliance_agent, AgentDeps
+from app.services.vector_store import VectorStoreService, user_namespace
 from app.services.chat_history import ChatHistoryService
-from app.models.schemas import QueryRequest, QueryResponse
+from app.services.conversation_summary import conversation_summary_service
+from app.services.followup_prefetcher import followup_prefetcher
+from app.models.schemas import QueryRequest, QueryResponse, BatchQueryRequest
 from app.core.auth import get_current_user
+from app.core.config import settings
 from app.core.database import db
+from app.core.metrics import metrics
+from app.core.responses import query_envelope, batch_line
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from loguru import logger
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Batch history writes outlive the stream when the client disconnects; keep references until done
+_persist_tasks: Set[asyncio.Task] = set()
 
 def get_vector_store():
     return VectorStoreService()
@@ -18,17 +29,28 @@ def get_vector_store():
 def get_chat_service():
     return ChatHistoryService()
 
+def response_text_of(result_data) -> str:
+    """The assistant message stored in history; always a non-empty string."""
+    response_text = result_data.response
+    if not response_text and result_data.reasoning:
+        response_text = result_data.reasoning
+    if not response_text:
+        response_text = "Analysis completed."
+    return response_text
+
 @router.post("/")
 async def query_compliance(
     request: QueryRequest,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
     vector_store: VectorStoreService = Depends(get_vector_store),
     chat_service: ChatHistoryService = Depends(get_chat_service)
 ):
-    print(f"[QUERY] Processing for user {current_user['email']}: {request.query}")
+    logger.info(f"[QUERY] Processing for user {current_user['email']}: {request.query}")
     
     # Fetch full user profile to get latest persona
-    user_profile = await db.db.users.find_one({"email": current_user["email"]})
+    with metrics.time("profile_lookup"):
+        user_profile = await db.db.users.find_one({"email": current_user["email"]})
     user_persona = user_profile.get("agent_persona", "strict_formal") if user_profile else "strict_formal"
     
     # Use user-specific session ID or create new one
@@ -36,56 +58,177 @@ async def query_compliance(
     
     try:
         # Prepare agent dependencies
-        deps = AgentDeps(vector_store=vector_store)
+        deps = AgentDeps(
+            vector_store=vector_store,
+            namespaces=[user_namespace(current_user["user_id"])],
+            filters=request.filters.model_dump(exclude_none=True) if request.filters else None
+        )
         
-        # Get conversation history for context
-        history = await chat_service.get_history(session_id, limit=5)
-        history_context = "\n".join([f"{msg['role']}: {msg['content']}" for msg in history]) if history else ""
+        # Clicked follow-up suggestions are usually answered ahead of time
+        # (prefetching is unfiltered, so filtered queries always retrieve)
+        prefetched = followup_prefetcher.get(current_user["user_id"], session_id, request.query) if request.session_id and not deps.filters else None
+        json_fragment = None
+        if prefetched is not None:
+            logger.info("[QUERY] Serving prefetched follow-up answer")
+            metrics.inc("query_path_total", path="prefetched")
+            result_data = prefetched
+        else:
+            # Get conversation history for context (rolling summary + recent turns)
+            with metrics.time("history_context"):
+                history_context = await conversation_summary_service.build_history_context(session_id)
+            
+            # Run LangChain Agent (production-ready)
+            with metrics.time("agent"):
+                result = await get_compliance_agent().run(
+                    request.query, 
+                    deps=deps, 
+                    history_context=history_context,
+                    persona=user_persona
+                )
+            result_data = result.data
+            # Fast-path KB answers come pre-serialized
+            json_fragment = getattr(result, "json_fragment", None)
         
-        # Run LangChain Agent (production-ready)
-        result = await compliance_agent.run(
-            request.query, 
-            deps=deps, 
-            history_context=history_context,
-            persona=user_persona
-        )
-        result_data = result.data
+        logger.info(f"[QUERY] Completed. Status: {result_data.status}")
         
-        print(f"[QUERY] Completed. Status: {result_data.status}")
+        # Ensure we always have a string response
+        response_text = response_text_of(result_data)
         
         # Save Interaction to DB
-        # We save separate messages for user and assistant with user_id
-        await chat_service.add_message(session_id, "user", request.query, user_id=current_user["user_id"])
+        # We save separate messages for user and assistant with user_id (buffered, written in batches)
+        with metrics.time("persist"):
+            await chat_service.add_messages(
+                session_id,
+                [("user", request.query), ("assistant", response_text)],
+                user_id=current_user["user_id"]
+            )
+        conversation_summary_service.schedule_refresh(session_id, current_user["user_id"])
         
-        # Ensure we always have a string response
-        response_text = result_data.response
-        if not response_text and result_data.reasoning:
-            response_text = result_data.reasoning
-        if not response_text:
-            response_text = "Analysis completed."
-            
-        await chat_service.add_message(session_id, "assistant", response_text, user_id=current_user["user_id"])
+        # Answer the suggested follow-ups once the response has been sent
+        if not deps.filters:
+            background_tasks.add_task(
+                followup_prefetcher.schedule,
+                current_user["user_id"], session_id, result_data.follow_up_questions, deps, user_persona
+            )
         
         # Return strict schema
-        return {
-            "session_id": session_id,
-            "data": result_data
-        }
+        return query_envelope(session_id, json_fragment if json_fragment is not None else result_data)
         
     except Exception as e:
-        print(f"[ERROR] Query failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"[ERROR] Query failed: {e}")
         # Safe sanitization
         raise HTTPException(status_code=500, detail="Internal Server Error: Unable to process request.")
 
+@router.post("/batch")
+async def query_compliance_batch(
+    request: BatchQueryRequest,
+    current_user: dict = Depends(get_current_user),
+    vector_store: VectorStoreService = Depends(get_vector_store),
+    chat_service: ChatHistoryService = Depends(get_chat_service)
+):
+    """
+    Answer a list of questions (e.g. an audit checklist) in one request.
+
+    Auth, profile lookup and history are done once, all questions are
+    embedded and searched together, and the answers run concurrently (LLM
+    calls under the shared limiter). Results stream back as NDJSON, one
+    line per question as soon as it is answered: KB fast-path hits first.
+    """
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="No questions provided.")
+    if len(request.queries) > settings.QUERY_BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.QUERY_BATCH_MAX_QUESTIONS} questions per batch.")
+
+    logger.info(f"[BATCH] {len(request.queries)} questions for user {current_user['email']}")
+    metrics.observe("query_batch_size", len(request.queries), buckets=(1, 5, 10, 25, 50, 100))
+
+    with metrics.time("profile_lookup"):
+        user_profile = await db.db.users.find_one({"email": current_user["email"]})
+    user_persona = user_profile.get("agent_persona", "strict_formal") if user_profile else "strict_formal"
+    session_id = request.session_id or f"{current_user['user_id']}_{str(uuid.uuid4())}"
+
+    deps = AgentDeps(
+        vector_store=vector_store,
+        namespaces=[user_namespace(current_user["user_id"])],
+        filters=request.filters.model_dump(exclude_none=True) if request.filters else None
+    )
+    with metrics.time("history_context"):
+        history_context = await conversation_summary_service.build_history_context(session_id)
+    # One embedding call and one FAISS search for the whole checklist, off the event loop
+    with metrics.time("retrieval"):
+        docs_per_query = await asyncio.to_thread(
+            vector_store.search_batch, request.queries, k=5, namespaces=deps.namespaces, filters=deps.filters
+        )
+
+    agent = get_compliance_agent()
+
+    async def answer(index: int):
+        try:
+            result = await agent.run(
+                request.queries[index],
+                deps=deps,
+                history_context=history_context,
+                persona=user_persona,
+                docs=docs_per_query[index]
+            )
+            return index, result, None
+        except Exception as e:
+            logger.exception(f"[BATCH] Question {index} failed: {e}")
+            metrics.inc("query_batch_errors_total")
+            return index, None, e
+
+    async def persist(answered: dict):
+        # All answers written to history at once, in checklist order
+        with metrics.time("persist"):
+            await chat_service.add_messages(
+                session_id,
+                [
+                    message
+                    for index in sorted(answered)
+                    for message in (("user", request.queries[index]), ("assistant", answered[index]))
+                ],
+                user_id=current_user["user_id"]
+            )
+        conversation_summary_service.schedule_refresh(session_id, current_user["user_id"])
+
+    async def stream():
+        tasks = [asyncio.create_task(answer(index)) for index in range(len(request.queries))]
+        answered = {}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, result, error = await next_done
+                if error is not None:
+                    yield batch_line(index, session_id, error="Unable to process this question.")
+                    continue
+                answered[index] = response_text_of(result.data)
+                # Fast-path KB answers come pre-serialized
+                yield batch_line(index, session_id, getattr(result, "json_fragment", None) or result.data)
+        finally:
+            # Client went away: stop the questions still waiting for the LLM
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                metrics.inc("query_batch_cancelled_total", len(pending))
+                logger.info(f"[BATCH] Client disconnected; cancelled {len(pending)} pending questions")
+
+            if answered:
+                # Answers already sent are kept even if the stream was cancelled,
+                # so the write runs as its own task rather than inside this one
+                persist_task = asyncio.create_task(persist(answered))
+                _persist_tasks.add(persist_task)
+                persist_task.add_done_callback(_persist_tasks.discard)
+                await asyncio.shield(persist_task)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @router.get("/history/sessions")
 async def get_sessions(
     current_user: dict = Depends(get_current_user),
     chat_service: ChatHistoryService = Depends(get_chat_service)
 ):
     """Get last 5 distinct chat sessions for the current user."""
-    return await chat_service.get_recent_sessions(current_user["user_id"], limit=5)
+    return ORJSONResponse(await chat_service.get_recent_sessions(current_user["user_id"], limit=5))
 
 @router.get("/history/{session_id}")
 async def get_session_history(
@@ -99,7 +242,7 @@ async def get_session_history(
          # Fallback check if UUID only (old sessions) or mismatch
          pass 
     
-    return await chat_service.get_history(session_id, limit=50)
+    return ORJSONResponse(await chat_service.get_history(session_id, limit=50))
 
 @router.get("/knowledge/demo/pdf")
 async def get_demo_pdf(
@@ -1,9 +1,14 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from app.api.endpoints import ingestion, query, health, auth
+from app.core.readiness import readiness
 
 router = APIRouter()
 
-router.include_router(auth.router, prefix="/auth", tags=["authentication"])
-router.include_router(ingestion.router, prefix="/ingest", tags=["ingestion"])
-router.include_router(query.router, prefix="/query", tags=["query"])
+# Requests are rejected with 503 until the components they use have warmed up
+router.include_router(auth.router, prefix="/auth", tags=["authentication"],
+                      dependencies=[Depends(readiness.require("mongo"))])
+router.include_router(ingestion.router, prefix="/ingest", tags=["ingestion"],
+                      dependencies=[Depends(readiness.require("embedder", "index", "mongo"))])
+router.include_router(query.router, prefix="/query", tags=["query"],
+                      dependencies=[Depends(readiness.require())])
 router.include_router(health.router, prefix="/health", tags=["health"])
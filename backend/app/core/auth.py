@@ -1,26 +1,49 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.ttl_cache import TTLCache
 
 # Security configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production-min-32-chars")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=4)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.AUTH_BCRYPT_ROUNDS)
 security = HTTPBearer()
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+# bcrypt is CPU-bound by design; it gets its own small pool so a login burst
+# queues here instead of blocking the event loop or the default executor
+_hash_executor = ThreadPoolExecutor(max_workers=settings.AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
 
-def get_password_hash(password: str) -> str:
+# Verified token -> claims, so authenticated requests skip the HMAC and claims checks
+_token_cache = TTLCache("jwt_claims", settings.AUTH_TOKEN_CACHE_MAX_ENTRIES, settings.AUTH_TOKEN_CACHE_TTL_SECONDS)
+
+async def _run_hasher(func, *args):
+    with metrics.time("password_hash"):
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+
+async def verify_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password against its hash.
+
+    Returns:
+        (verified, new_hash): `new_hash` is set when the stored hash uses an
+        outdated cost factor and should be replaced
+    """
+    return await _run_hasher(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash(password: str) -> str:
     """Hash a password."""
-    return pwd_context.hash(password)
+    return await _run_hasher(pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
@@ -36,9 +59,12 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def decode_token(token: str) -> dict:
     """Decode and verify a JWT token."""
+    payload = _token_cache.get(token)
+    if payload is not None:
+        return dict(payload)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -46,6 +72,12 @@ def decode_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Never serve cached claims past the token's own expiry
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        _token_cache.set(token, payload, ttl_seconds=min(expires_in, settings.AUTH_TOKEN_CACHE_TTL_SECONDS))
+    return dict(payload)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Dependency to get the current authenticated user from JWT token."""
     token = credentials.credentials
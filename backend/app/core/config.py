@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Union
+from typing import Dict, List, Union
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Regulatory Compliance Assistant"
@@ -11,6 +11,71 @@ class Settings(BaseSettings):
         "https://compliance-ai-arvind.vercel.app"
     ]
 
+    # Chat history retention
+    CHAT_HISTORY_TTL_DAYS: int = 90  # 0 disables the TTL index
+    CHAT_HISTORY_MAX_SESSIONS: int = 5  # Sessions kept per user by the pruner
+    CHAT_HISTORY_PRUNE_INTERVAL_SECONDS: int = 3600  # 0 disables the pruner
+    CHAT_HISTORY_PRUNE_BATCH_SIZE: int = 500
+
+    # Write-behind buffer for chat messages
+    CHAT_BUFFER_FLUSH_SIZE: int = 100  # Flush once this many messages are pending
+    CHAT_BUFFER_FLUSH_INTERVAL_MS: int = 500  # ...or after this long
+    CHAT_BUFFER_MAX_PENDING: int = 5000  # Producers wait when the buffer is full
+    CHAT_BUFFER_MAX_ATTEMPTS: int = 8  # Failed writes per message before it is dead-lettered
+    CHAT_BUFFER_RETRY_BACKOFF_MS: int = 500  # First delay after a failed flush, doubled per failure
+    CHAT_BUFFER_RETRY_BACKOFF_MAX_SECONDS: float = 30.0
+
+    # Rolling conversation summaries
+    HISTORY_SUMMARY_TOKEN_BUDGET: int = 1200  # Summarize once unsummarized history exceeds this
+    HISTORY_RECENT_MESSAGES: int = 4  # Messages always kept verbatim after the summary
+    HISTORY_SUMMARY_MODEL: str = "llama-3.1-8b-instant"
+    HISTORY_SUMMARY_MAX_TOKENS: int = 300
+
+    # LLM provider routing
+    LLM_HEDGE_ENABLED: bool = True  # Send a hedged request when the primary is slow
+    LLM_HEDGE_PERCENTILE: float = 95.0  # ...slower than this percentile of its own latency
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # Latency samples needed before hedging kicks in
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open the breaker
+    LLM_CIRCUIT_RESET_SECONDS: float = 30.0  # Time before a half-open probe is allowed
+
+    # Shared Groq rate limiting
+    LLM_MAX_CONCURRENCY: int = 4  # In-flight LLM calls across all requests
+    LLM_REQUESTS_PER_MINUTE: int = 30
+    LLM_TOKENS_PER_MINUTE: int = 12000
+    LLM_QUEUE_DEADLINE_SECONDS: float = 20.0  # Max time a call may wait for capacity
+    LLM_OUTPUT_TOKENS_ESTIMATE: int = 800  # Reserved per call for the completion
+
+    # Latency budget for the LLM path; past it an extractive answer is returned
+    LLM_LATENCY_BUDGET_SECONDS: float = 12.0
+    LLM_LATENCY_BUDGETS: Dict[str, float] = {}  # Per-persona overrides, e.g. {"concise": 6}
+
+    # Answer cache for completed LLM results
+    ANSWER_CACHE_TTL_SECONDS: int = 600
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
+    ANSWER_CACHE_LATE_RESULTS: bool = True  # Keep LLM calls that overran the budget and cache their result
+
+    # Speculative answers for suggested follow-up questions
+    PREFETCH_ENABLED: bool = True
+    PREFETCH_TTL_SECONDS: int = 300
+    PREFETCH_MAX_ENTRIES: int = 2000
+    PREFETCH_TOKENS_PER_MINUTE: int = 4000  # LLM spend allowed for prefetching
+
+    # Batch queries (audit checklists)
+    QUERY_BATCH_MAX_QUESTIONS: int = 100
+
+    # Per-tenant vector indexes (uploads); the Golden KB stays in data/faiss_index
+    VECTOR_TENANT_INDEX_DIR: str = "data/faiss_index_tenants"
+    VECTOR_TENANT_MEMORY_BUDGET_MB: int = 128  # Least recently used tenant indexes are unloaded past this
+
+    # Authentication
+    AUTH_BCRYPT_ROUNDS: int = 4  # Cost factor for new hashes; older hashes are upgraded on login
+    AUTH_HASH_WORKERS: int = 2  # Threads for bcrypt, so a login burst cannot take the whole event loop
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10000  # Verified JWT -> claims, kept until the token expires
+    AUTH_TOKEN_CACHE_TTL_SECONDS: int = 3600  # Upper bound on how long verified claims are reused
+
+    # Follow-up suggestions for answers without a KB mapping
+    FOLLOWUP_SUGGESTION_MIN_SIMILARITY: float = 0.55
+
     class Config:
         case_sensitive = True
 
@@ -1,5 +1,8 @@
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import OperationFailure
+from app.core.config import settings
+from loguru import logger
 
 class Database:
     client: AsyncIOMotorClient = None
@@ -24,7 +27,7 @@ class Database:
         }
         
         try:
-            print("🔄 Connecting to MongoDB...")
+            logger.info("🔄 Connecting to MongoDB...")
             self.client = AsyncIOMotorClient(mongo_uri, **connection_options)
             self.db = self.client["compliance_rag_db"]
             
@@ -35,17 +38,51 @@ class Database:
             await self.db.users.create_index("email", unique=True, background=True)
             await self.db.chat_history.create_index("user_id", background=True)
             await self.db.chat_history.create_index("session_id", background=True)
+            await self.db.chat_history.create_index([("user_id", 1), ("timestamp", -1)], background=True)
+            await self.db.chat_summaries.create_index("session_id", unique=True, background=True)
+            await self._ensure_ttl_index("chat_history", "timestamp")
+            await self._ensure_ttl_index("chat_summaries", "updated_at")
             
             # Determine connection type for logging
             connection_type = "MongoDB Atlas" if "mongodb+srv://" in mongo_uri else "Local MongoDB"
-            print(f"✓ Connected to {connection_type}")
+            logger.info(f"✓ Connected to {connection_type}")
         except Exception as e:
-            print(f"✗ Failed to connect to MongoDB: {e}")
+            logger.error(f"✗ Failed to connect to MongoDB: {e}")
             raise
 
+    async def _ensure_ttl_index(self, collection_name: str, field: str):
+        """Expire documents older than CHAT_HISTORY_TTL_DAYS via a TTL index on `field`."""
+        ttl_days = settings.CHAT_HISTORY_TTL_DAYS
+        collection = self.db[collection_name]
+        index_name = f"{field}_ttl"
+
+        if ttl_days <= 0:
+            # Retention by age disabled: drop a previously created TTL index
+            indexes = await collection.index_information()
+            if index_name in indexes:
+                await collection.drop_index(index_name)
+            return
+
+        expire_after = ttl_days * 24 * 60 * 60
+        try:
+            await collection.create_index(
+                field,
+                name=index_name,
+                expireAfterSeconds=expire_after,
+                background=True
+            )
+        except OperationFailure:
+            # Index exists with a different TTL; update it in place instead of rebuilding
+            await self.db.command(
+                "collMod",
+                collection_name,
+                index={"name": index_name, "expireAfterSeconds": expire_after}
+            )
+        logger.info(f"✓ {collection_name} TTL set to {ttl_days} days")
+
     def close(self):
         if self.client:
             self.client.close()
-            print("✓ Disconnected from MongoDB")
+            logger.info("✓ Disconnected from MongoDB")
 
 db = Database()
@@ -0,0 +1,184 @@
+import asyncio
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import httpx
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+class LimiterTimeout(Exception):
+    """Raised when an LLM call could not get capacity before its deadline."""
+    pass
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+def parse_reset_duration(value: str) -> Optional[float]:
+    """Parse Groq/OpenAI style reset durations ("7.66s", "2m59.56s", "120ms") into seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        now = time.monotonic()
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def clamp(self, remaining: float):
+        """Align with the provider's view of what is left in the current window."""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, remaining)
+
+class LLMLimiter:
+    """
+    Process-wide gate for calls to the Groq API.
+
+    - A semaphore caps in-flight calls.
+    - Token buckets enforce requests/min and tokens/min.
+    - Rate-limit response headers tighten the buckets, and `retry-after`
+      pauses all callers until the provider window resets.
+
+    Callers queue until capacity is available or their deadline passes, in
+    which case LimiterTimeout is raised.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+        requests_per_minute: int = settings.LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = settings.LLM_TOKENS_PER_MINUTE,
+        deadline_seconds: float = settings.LLM_QUEUE_DEADLINE_SECONDS
+    ):
+        self.max_concurrency = max_concurrency
+        self.deadline_seconds = deadline_seconds
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.blocked_until = 0.0
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._bucket_lock: Optional[asyncio.Lock] = None
+
+    def _primitives(self):
+        # Created lazily so they bind to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._bucket_lock = asyncio.Lock()
+        return self._semaphore, self._bucket_lock
+
+    def is_busy(self) -> bool:
+        """True when callers are queueing or every slot is in use."""
+        return self.waiting > 0 or self.in_flight >= self.max_concurrency
+
+    @asynccontextmanager
+    async def acquire(self, tokens: int = settings.LLM_OUTPUT_TOKENS_ESTIMATE, deadline: Optional[float] = None):
+        """
+        Wait for a concurrency slot and rate budget for a call of roughly `tokens` tokens.
+
+        Args:
+            tokens: Estimated prompt + completion tokens of the call
+            deadline: Max seconds to wait (defaults to LLM_QUEUE_DEADLINE_SECONDS)
+        """
+        semaphore, bucket_lock = self._primitives()
+        start = time.monotonic()
+        deadline_at = start + (deadline if deadline is not None else self.deadline_seconds)
+
+        self.waiting += 1
+        try:
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=max(deadline_at - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                metrics.inc("llm_limiter_timeouts_total", stage="concurrency")
+                raise LimiterTimeout("Timed out waiting for an LLM slot")
+
+            try:
+                # One waiter at a time drains the buckets, which keeps the queue FIFO
+                async with bucket_lock:
+                    while True:
+                        now = time.monotonic()
+                        wait = max(
+                            self.requests.wait_time(1),
+                            self.tokens.wait_time(tokens),
+                            self.blocked_until - now
+                        )
+                        if wait <= 0:
+                            break
+                        if now + wait > deadline_at:
+                            metrics.inc("llm_limiter_timeouts_total", stage="rate")
+                            raise LimiterTimeout(f"LLM rate limit would delay this call by {wait:.1f}s")
+                        await asyncio.sleep(wait)
+
+                    self.requests.consume(1)
+                    self.tokens.consume(tokens)
+            except BaseException:
+                semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+
+        metrics.observe("llm_limiter_queue_wait_seconds", time.monotonic() - start)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+    async def observe_response(self, response: httpx.Response):
+        """httpx response hook: feed provider rate-limit headers back into the buckets."""
+        headers = response.headers
+
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None:
+            try:
+                self.tokens.clamp(float(remaining_tokens))
+            except ValueError:
+                pass
+
+        if response.status_code == 429:
+            retry_after = parse_reset_duration(headers.get("retry-after", "")) or \
+                parse_reset_duration(headers.get("x-ratelimit-reset-tokens", "")) or 1.0
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            metrics.inc("llm_rate_limited_total")
+            logger.warning(f"LLM provider returned 429; pausing LLM calls for {retry_after:.1f}s")
+
+    def http_client(self) -> httpx.AsyncClient:
+        """An httpx client whose responses update this limiter (for ChatGroq's http_async_client)."""
+        return httpx.AsyncClient(event_hooks={"response": [self.observe_response]})
+
+def estimate_tokens(*texts: str, completion: int = settings.LLM_OUTPUT_TOKENS_ESTIMATE) -> int:
+    """Cheap token estimate (~4 chars per token) used for rate budgeting, not prompt limits."""
+    return sum(len(t) for t in texts if t) // 4 + completion
+
+llm_limiter = LLMLimiter()
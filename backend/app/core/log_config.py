@@ -0,0 +1,41 @@
+import inspect
+import logging
+import sys
+
+from loguru import logger
+
+from app.core.tracing import current_correlation_id
+
+LOG_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
+    "<level>{level: <8}</level> | "
+    "<magenta>{extra[correlation_id]}</magenta> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+)
+
+def _add_correlation_id(record):
+    record["extra"].setdefault("correlation_id", current_correlation_id() or "-")
+
+class InterceptHandler(logging.Handler):
+    """Route stdlib `logging` records (pydantic-ai, router, libraries) through loguru."""
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+
+        # Find the caller outside the logging module so loguru reports the right location
+        frame, depth = inspect.currentframe(), 0
+        while frame and (depth == 0 or frame.f_code.co_filename == logging.__file__):
+            frame = frame.f_back
+            depth += 1
+        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+
+def configure_logging(level: str = "INFO"):
+    """Single loguru sink for the app; every line carries the request's correlation ID."""
+    logger.remove()
+    logger.configure(patcher=_add_correlation_id)
+    logger.add(sys.stderr, level=level, format=LOG_FORMAT)
+    # Library INFO chatter (httpx per-request lines) stays off; app loggers set their own level
+    logging.basicConfig(handlers=[InterceptHandler()], level=logging.WARNING, force=True)
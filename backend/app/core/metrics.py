@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Sequence, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from app.core.tracing import record_stage
+
+# Seconds; spans tiktoken/FAISS (sub-ms) up to slow Groq completions
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+class Metrics:
+    """
+    Prometheus-backed metrics registry, exported at /metrics.
+
+    Metrics are created on first use, with the label names of that call.
+    Counters only go up, gauges hold the last value set, and observations
+    go into histograms (latency buckets unless `buckets` is given).
+
+    With PROMETHEUS_MULTIPROC_DIR set (several uvicorn/gunicorn workers),
+    every worker writes its samples to that directory and /metrics
+    aggregates all of them.
+    """
+
+    def __init__(self, registry: CollectorRegistry = REGISTRY):
+        self.registry = registry
+        self.multiprocess_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def _metric(self, cls, name: str, labels: Dict[str, str], **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = cls(
+                        name,
+                        name.replace("_", " "),
+                        labelnames=sorted(labels),
+                        registry=self.registry,
+                        **kwargs
+                    )
+                    self._metrics[name] = metric
+        return metric.labels(**{k: str(v) for k, v in labels.items()}) if labels else metric
+
+    def inc(self, name: str, value: float = 1, **labels):
+        self._metric(Counter, name, labels).inc(value)
+
+    def set_gauge(self, name: str, value: float, **labels):
+        # Across workers, report the highest live value
+        self._metric(Gauge, name, labels, multiprocess_mode="livemax").set(value)
+
+    def observe(self, name: str, value: float, buckets: Optional[Sequence[float]] = None, **labels):
+        self._metric(Histogram, name, labels, buckets=buckets or LATENCY_BUCKETS).observe(value)
+
+    def observe_stage(self, stage: str, seconds: float, **labels):
+        """Record a pipeline stage in `pipeline_stage_seconds{stage=...}` and the current request trace."""
+        self.observe("pipeline_stage_seconds", seconds, stage=stage, **labels)
+        record_stage(stage, seconds)
+
+    @contextmanager
+    def time(self, stage: str, **labels):
+        """Time the enclosed block as a pipeline stage (see observe_stage)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - start, **labels)
+
+    def render(self) -> Tuple[bytes, str]:
+        """Prometheus text exposition of all metrics (aggregated across workers in multiprocess mode)."""
+        if self.multiprocess_dir:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return generate_latest(registry), CONTENT_TYPE_LATEST
+        return generate_latest(self.registry), CONTENT_TYPE_LATEST
+
+    def shutdown(self):
+        """Drop this worker's live gauges from the multiprocess aggregate."""
+        if self.multiprocess_dir:
+            multiprocess.mark_process_dead(os.getpid())
+
+metrics = Metrics()
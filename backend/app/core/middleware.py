@@ -1,29 +1,67 @@
 import time
 import uuid
-from fastapi import Request
 from loguru import logger
+from starlette.datastructures import Headers, MutableHeaders, URL
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.tracing import start_trace
 
-async def logging_middleware(request: Request, call_next):
-    start_time = time.time()
-    correlation_id = request.headers.get("X-Correlation-ID", str(uuid.uuid4()))
-    
-    # Log Request
-    logger.info(f"[{correlation_id}] Incoming Request: {request.method} {request.url}")
-    
-    try:
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        
-        # Add Header to response for tracing
-        response.headers["X-Correlation-ID"] = correlation_id
-        
-        # Log Response
-        logger.info(
-            f"[{correlation_id}] Response: {response.status_code} "
-            f"Process Time: {process_time:.4f}s"
-        )
-        return response
-        
-    except Exception as e:
-        logger.error(f"[{correlation_id}] Request Failed: {str(e)}")
-        raise e
+class LoggingMiddleware:
+    """
+    Correlation ID, Server-Timing and request logging as a plain ASGI middleware.
+
+    Unlike BaseHTTPMiddleware it does not run the app in a separate task or
+    re-stream the response body; it only rewrites the response start message.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.time()
+        correlation_id = Headers(scope=scope).get("X-Correlation-ID", str(uuid.uuid4()))
+        # Stages recorded downstream (metrics.time / observe_stage) land in this trace
+        trace = start_trace(correlation_id)
+
+        # Log Request
+        logger.info(f"[{correlation_id}] Incoming Request: {scope['method']} {URL(scope=scope)}")
+
+        status_code = None
+
+        async def send_with_headers(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Add Header to response for tracing
+                headers = MutableHeaders(scope=message)
+                headers["X-Correlation-ID"] = correlation_id
+                # Per-stage timings, shown in the browser devtools network timing tab
+                headers["Server-Timing"] = trace.server_timing()
+                headers["Timing-Allow-Origin"] = "*"
+            await send(message)
+
+            if message["type"] == "http.response.start":
+                # Logged once headers are sent, like the previous call_next-based middleware
+                process_time = time.time() - start_time
+
+                # Log Response: one structured line per request with its stage breakdown
+                logger.bind(
+                    method=scope["method"],
+                    path=scope["path"],
+                    status=status_code,
+                    duration_ms=round(process_time * 1000, 1),
+                    stages={stage: round(seconds * 1000, 1) for stage, seconds in trace.stages.items()}
+                ).info(
+                    f"[{correlation_id}] Response: {status_code} "
+                    f"Process Time: {process_time:.4f}s"
+                    + (f" Stages: {trace.summary()}" if trace.stages else "")
+                )
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        except Exception as e:
+            logger.error(f"[{correlation_id}] Request Failed: {str(e)}")
+            raise e
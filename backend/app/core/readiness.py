@@ -0,0 +1,51 @@
+import time
+from typing import Dict
+
+from fastapi import HTTPException, status
+
+class Readiness:
+    """
+    Tracks which heavy components have finished initializing.
+
+    Components are warmed up in the background after the server binds its
+    port; endpoints that need them declare it with `require(...)` and get a
+    503 until they are ready.
+    """
+
+    COMPONENTS = ("embedder", "index", "llm_client", "mongo")
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self._state: Dict[str, Dict] = {
+            name: {"ready": False, "error": None, "seconds": None} for name in self.COMPONENTS
+        }
+
+    def mark_ready(self, name: str):
+        self._state[name] = {
+            "ready": True,
+            "error": None,
+            "seconds": round(time.monotonic() - self.started_at, 3)
+        }
+
+    def mark_failed(self, name: str, error: Exception):
+        self._state[name] = {"ready": False, "error": str(error), "seconds": None}
+
+    def is_ready(self, *names: str) -> bool:
+        return all(self._state[name]["ready"] for name in (names or self.COMPONENTS))
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {name: dict(state) for name, state in self._state.items()}
+
+    def require(self, *names: str):
+        """FastAPI dependency that rejects requests until `names` (default: all) are ready."""
+        def dependency():
+            if not self.is_ready(*names):
+                pending = [n for n in (names or self.COMPONENTS) if not self._state[n]["ready"]]
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"Service is starting up (waiting for: {', '.join(pending)})",
+                    headers={"Retry-After": "5"}
+                )
+        return dependency
+
+readiness = Readiness()
@@ -0,0 +1,31 @@
+from typing import Any, Optional
+
+import orjson
+from fastapi.responses import ORJSONResponse, Response
+
+def query_envelope(session_id: str, data: Any) -> Response:
+    """
+    The `{"session_id", "data"}` body of /query.
+
+    `data` is either a model or JSON bytes already serialized (fast-path KB
+    answers), in which case only the session ID is serialized here.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        body = b'{"session_id":' + orjson.dumps(session_id) + b',"data":' + bytes(data) + b'}'
+        return Response(content=body, media_type="application/json")
+    if hasattr(data, "model_dump"):
+        data = data.model_dump()
+    return ORJSONResponse({"session_id": session_id, "data": data})
+
+def batch_line(index: int, session_id: str, data: Any = None, error: Optional[str] = None) -> bytes:
+    """
+    One NDJSON line of /query/batch: `{"index", "session_id", "data"}` for an
+    answered question (model or pre-serialized bytes, as in query_envelope),
+    or `{"index", "session_id", "error"}` for a failed one.
+    """
+    head = b'{"index":' + orjson.dumps(index) + b',"session_id":' + orjson.dumps(session_id)
+    if error is not None:
+        return head + b',"error":' + orjson.dumps(error) + b'}\n'
+    if not isinstance(data, (bytes, bytearray)):
+        data = orjson.dumps(data.model_dump() if hasattr(data, "model_dump") else data)
+    return head + b',"data":' + bytes(data) + b'}\n'
@@ -0,0 +1,109 @@
+import builtins
+import importlib
+import sys
+import time
+import types
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from loguru import logger
+
+from app.core.metrics import metrics
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+            startup_profiler.record_import(self.__name__, time.perf_counter() - start, lazy=True)
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Defer importing a heavy engine (LangChain integrations, FastEmbed, FAISS,
+    pydantic-ai, PDF loaders) until it is actually used, so code paths that
+    never touch it don't pay for it at startup.
+    """
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+class StartupProfiler:
+    """
+    Records where cold-start time goes: per-module import time while `main`
+    is imported, and init time of the heavy singletons during warmup.
+    Results are logged once the app is ready and exported as gauges.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.imports_done_at: Optional[float] = None
+        self.imports: Dict[str, float] = {}
+        self.lazy_imports: Dict[str, float] = {}
+        self.inits: Dict[str, float] = {}
+
+    def record_import(self, module: str, seconds: float, lazy: bool = False):
+        (self.lazy_imports if lazy else self.imports).setdefault(module, seconds)
+        if lazy:
+            metrics.set_gauge("startup_lazy_import_seconds", round(seconds, 4), module=module)
+
+    @contextmanager
+    def profile_imports(self):
+        """Time the first import of every module imported inside the block (inclusive of its own imports)."""
+        original_import = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return original_import(name, globals, locals, fromlist, level)
+            start = time.perf_counter()
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                self.record_import(name, time.perf_counter() - start)
+
+        builtins.__import__ = timed_import
+        try:
+            yield
+        finally:
+            builtins.__import__ = original_import
+            self.imports_done_at = time.perf_counter()
+
+    @contextmanager
+    def time_init(self, name: str):
+        """Time the construction of a singleton or other one-off startup step."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.inits[name] = time.perf_counter() - start
+            metrics.set_gauge("startup_init_seconds", round(self.inits[name], 4), component=name)
+
+    def report(self, top_n: int = 15):
+        """Log the slowest imports and every init step, and export them as gauges."""
+        ready_seconds = time.perf_counter() - self.started_at
+        metrics.set_gauge("startup_ready_seconds", round(ready_seconds, 4))
+
+        import_seconds = (self.imports_done_at or self.started_at) - self.started_at
+        metrics.set_gauge("startup_import_total_seconds", round(import_seconds, 4))
+
+        slowest = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:top_n]
+        for module, seconds in slowest:
+            metrics.set_gauge("startup_import_seconds", round(seconds, 4), module=module)
+
+        lines = [f"Startup profile: ready in {ready_seconds:.2f}s (imports {import_seconds:.2f}s)"]
+        lines += [f"  import {module:<50} {seconds * 1000:8.1f} ms" for module, seconds in slowest]
+        lines += [f"  lazy   {module:<50} {seconds * 1000:8.1f} ms" for module, seconds in self.lazy_imports.items()]
+        lines += [f"  init   {name:<50} {seconds * 1000:8.1f} ms" for name, seconds in self.inits.items()]
+        logger.info("\n".join(lines))
+
+startup_profiler = StartupProfiler()
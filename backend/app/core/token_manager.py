@@ -1,5 +1,7 @@
 import tiktoken
-from typing import List
+from functools import lru_cache
+from typing import List, Tuple
+from langchain_core.documents import Document
 from loguru import logger
 
 class TokenManager:
@@ -10,12 +12,109 @@ class TokenManager:
             self.encoder = tiktoken.get_encoding("cl100k_base")
         
         self.max_input_tokens = max_input_tokens
+        # Queries repeat a lot (checklists, follow-up clicks); remember their token counts
+        self.count_cached = lru_cache(maxsize=2048)(self.count_tokens)
 
     def count_tokens(self, text: str) -> int:
         if not text:
             return 0
         return len(self.encoder.encode(text))
 
+    def doc_tokens(self, doc: Document) -> int:
+        """
+        Token count of a chunk, precomputed at ingest in metadata["token_count"].
+        Chunks indexed before that was added are counted once and memoized in place.
+        """
+        count = doc.metadata.get("token_count")
+        if count is None:
+            count = self.count_tokens(doc.page_content)
+            doc.metadata["token_count"] = count
+        return count
+
+    def pack_context(self, history: str, docs: List[Document], query: str) -> Tuple[str, str]:
+        """
+        Fit history and retrieved chunks into the input budget.
+
+        Chunks are taken greedily in relevance order using their stored token
+        counts; a chunk that does not fit is dropped whole rather than cut.
+
+        Returns:
+            (history, context) ready to be placed in the prompt
+        """
+        available_info_tokens = self.max_input_tokens - self.count_cached(query) - 500
+
+        if available_info_tokens < 0:
+            logger.warning("Query is too large! Dropping history and context.")
+            return "", ""
+
+        history_tokens = self.history_tokens(history)
+        if available_info_tokens - history_tokens < 1000:
+            history = self.trim_history(history, max(available_info_tokens - 1000, 0))
+            history_tokens = self.history_tokens(history)
+
+        remaining = available_info_tokens - history_tokens
+        packed, dropped = [], 0
+        for doc in docs:
+            cost = self.doc_tokens(doc) + 1  # +1 for the joining newline
+            if cost <= remaining:
+                packed.append(doc.page_content)
+                remaining -= cost
+            else:
+                dropped += 1
+
+        if dropped:
+            logger.info(f"Context packing dropped {dropped} of {len(docs)} chunks to stay within {available_info_tokens} tokens")
+
+        return history, "\n".join(packed)
+
+    @staticmethod
+    def _split_history(history: str) -> Tuple[str, List[str]]:
+        """Split history into a summary preamble and "role: content" turns."""
+        preamble, turns = [], []
+        for line in history.split("\n"):
+            if line.startswith(("user: ", "assistant: ")):
+                turns.append(line)
+            elif turns:
+                turns[-1] += "\n" + line
+            else:
+                preamble.append(line)
+        return "\n".join(preamble).strip(), turns
+
+    def history_tokens(self, history: str) -> int:
+        """
+        Token count of a history string, summed from the cached counts of its
+        summary and turns (+1 per turn for the joining newline). The same turns
+        come back on every request of a session, so only new ones are encoded.
+        """
+        preamble_text, turns = self._split_history(history)
+        return self.count_cached(preamble_text) + sum(self.count_cached(turn) + 1 for turn in turns)
+
+    def trim_history(self, history: str, max_tokens: int) -> str:
+        """
+        Fit history into `max_tokens` by dropping whole turns, oldest first.
+        A leading conversation summary is kept; it is only cut (from its start)
+        when it alone exceeds the budget.
+        """
+        preamble_text, turns = self._split_history(history)
+        preamble_tokens = self.count_cached(preamble_text)
+        turn_tokens = [self.count_cached(turn) + 1 for turn in turns]
+
+        total = preamble_tokens + sum(turn_tokens)
+        if total <= max_tokens:
+            return history
+
+        for start, cost in enumerate(turn_tokens):
+            total -= cost
+            if total <= max_tokens and start + 1 < len(turns):
+                return "\n\n".join(filter(None, [preamble_text, "\n".join(turns[start + 1:])]))
+
+        if preamble_tokens <= max_tokens:
+            return preamble_text
+        if max_tokens <= 0:
+            return ""
+        tokens = self.encoder.encode(preamble_text)
+        return self.encoder.decode(tokens[-max_tokens:])
+
     def validate_and_truncate(self, history: str, regulatory_context: str, query: str) -> str:
         query_tokens = self.count_tokens(query)
         history_tokens = self.count_tokens(history)
@@ -36,7 +135,7 @@ class TokenManager:
         remaining_for_context = available_info_tokens - history_tokens
         
         if remaining_for_context < 1000:
-            history = history[-2000:]
+            history = self.trim_history(history, max(available_info_tokens - 1000, 0))
             history_tokens = self.count_tokens(history)
             remaining_for_context = available_info_tokens - history_tokens
 
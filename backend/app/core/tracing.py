@@ -0,0 +1,48 @@
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+class RequestTrace:
+    """Stage timings of one HTTP request, keyed by its correlation ID."""
+
+    def __init__(self, correlation_id: str):
+        self.correlation_id = correlation_id
+        self.started = time.perf_counter()
+        # Insertion-ordered; repeated stages (e.g. two embeddings) accumulate
+        self.stages: Dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """`Server-Timing` header value: one metric per stage plus the total, in milliseconds."""
+        parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stages.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def summary(self) -> str:
+        return ",".join(f"{stage}:{seconds * 1000:.1f}ms" for stage, seconds in self.stages.items())
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+def start_trace(correlation_id: str) -> RequestTrace:
+    """Begin a trace for the current request; tasks and threads spawned from it inherit it."""
+    trace = RequestTrace(correlation_id)
+    _current_trace.set(trace)
+    return trace
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+def current_correlation_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.correlation_id if trace else None
+
+def record_stage(stage: str, seconds: float):
+    """Add a stage timing to the current request's trace, if there is one."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(stage, seconds)
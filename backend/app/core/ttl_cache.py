@@ -0,0 +1,42 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.core.metrics import metrics
+
+class TTLCache:
+    """
+    Small in-process LRU cache whose entries expire after `ttl_seconds`.
+    Hits and misses are counted under the cache `name`.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            metrics.inc("cache_requests_total", cache=self.name, result="miss")
+            return None
+        self._data.move_to_end(key)
+        metrics.inc("cache_requests_total", cache=self.name, result="hit")
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        expires = time.monotonic() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] >= time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -33,10 +33,23 @@ class UserUpdate(BaseModel):
     full_name: Optional[str] = None
     agent_persona: Optional[str] = None
 
+class SearchFilters(BaseModel):
+    """Restrict retrieval to chunks whose metadata matches any of the listed values."""
+    type: Optional[List[str]] = Field(None, min_length=1)  # e.g. ["kb_entry"] or ["pdf"]
+    category: Optional[List[str]] = Field(None, min_length=1)
+    source: Optional[List[str]] = Field(None, min_length=1)  # Document name, e.g. an uploaded PDF's file name
+
 # Update existing QueryRequest to include user_id
 class QueryRequest(BaseModel):
     query: str
     session_id: Optional[str] = None
+    filters: Optional[SearchFilters] = None
+
+class BatchQueryRequest(BaseModel):
+    """A list of questions answered in one request, e.g. an audit checklist."""
+    queries: List[str]
+    session_id: Optional[str] = None
+    filters: Optional[SearchFilters] = None
 
 class QueryResponse(BaseModel):
     session_id: str
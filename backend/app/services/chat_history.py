@@ -1,27 +1,274 @@
+import asyncio
 from app.core.database import db
-from typing import List, Dict
-from datetime import datetime
+from app.core.config import settings
+from app.core.metrics import metrics
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from typing import List, Dict, Optional, Tuple
+from datetime import datetime, timedelta
+from loguru import logger
+
+class ChatWriteBuffer:
+    """
+    Write-behind buffer shared by all requests.
+
+    Messages are queued in memory and flushed to chat_history with a single
+    insert_many once `flush_size` messages are pending or `flush_interval_ms`
+    has elapsed. Every message gets its _id up front, so readers can merge
+    buffered and persisted messages without duplicates.
+
+    After a failed flush the flusher backs off exponentially. A message that
+    fails `max_attempts` writes is dead-lettered: logged in full at ERROR
+    level and counted in chat_buffer_dead_letter_total, then dropped.
+    """
+
+    def __init__(
+        self,
+        flush_size: int = settings.CHAT_BUFFER_FLUSH_SIZE,
+        flush_interval_ms: int = settings.CHAT_BUFFER_FLUSH_INTERVAL_MS,
+        max_pending: int = settings.CHAT_BUFFER_MAX_PENDING,
+        max_wait_seconds: float = 5.0,
+        max_attempts: int = settings.CHAT_BUFFER_MAX_ATTEMPTS,
+        retry_backoff_ms: int = settings.CHAT_BUFFER_RETRY_BACKOFF_MS,
+        retry_backoff_max_seconds: float = settings.CHAT_BUFFER_RETRY_BACKOFF_MAX_SECONDS
+    ):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self.max_wait_seconds = max_wait_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff_ms / 1000
+        self.retry_backoff_max = retry_backoff_max_seconds
+        self._pending: List[Dict] = []
+        self._inflight: List[Dict] = []
+        self._attempts: Dict[ObjectId, int] = {}
+        self._cond: Optional[asyncio.Condition] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def _size(self) -> int:
+        return len(self._pending) + len(self._inflight)
+
+    async def add(self, messages: List[Dict]):
+        """
+        Queue messages for persistence. When the buffer is full the caller waits
+        for a flush (backpressure); if Mongo cannot keep up within
+        `max_wait_seconds` the messages are written directly instead.
+        """
+        async with self._cond:
+            if self._size() + len(messages) > self.max_pending:
+                metrics.inc("chat_buffer_backpressure_total")
+                try:
+                    await asyncio.wait_for(
+                        self._cond.wait_for(lambda: self._size() + len(messages) <= self.max_pending),
+                        timeout=self.max_wait_seconds
+                    )
+                except asyncio.TimeoutError:
+                    messages_to_write = messages
+                else:
+                    messages_to_write = None
+            else:
+                messages_to_write = None
+
+            if messages_to_write is None:
+                self._pending.extend(messages)
+                metrics.set_gauge("chat_buffer_pending", self._size())
+                if len(self._pending) >= self.flush_size:
+                    self._cond.notify_all()
+                return
+
+        metrics.inc("chat_buffer_direct_writes_total")
+        await db.db["chat_history"].insert_many(messages_to_write, ordered=False)
+
+    def buffered(self, session_id: Optional[str] = None, user_id: Optional[str] = None) -> List[Dict]:
+        """Messages not yet confirmed in Mongo, filtered by session or user."""
+        return [
+            msg for msg in self._inflight + self._pending
+            if (session_id is None or msg["session_id"] == session_id)
+            and (user_id is None or msg["user_id"] == user_id)
+        ]
+
+    def _requeue(self, failed: List[Dict]):
+        """
+        Put failed messages back behind the pending ones (readers sort by
+        timestamp, so write order does not matter) or dead-letter them once
+        they have used up their attempts.
+        """
+        retry, dead = [], []
+        for msg in failed:
+            attempts = self._attempts.get(msg["_id"], 0) + 1
+            if attempts >= self.max_attempts:
+                self._attempts.pop(msg["_id"], None)
+                dead.append(msg)
+            else:
+                self._attempts[msg["_id"]] = attempts
+                retry.append(msg)
+        self._pending.extend(retry)
+
+        if dead:
+            metrics.inc("chat_buffer_dead_letter_total", len(dead))
+            for msg in dead:
+                logger.bind(dead_letter=True).error(f"[ChatBuffer] Dropping message after {self.max_attempts} failed writes: {msg}")
+
+    async def flush(self) -> bool:
+        """
+        Write everything currently pending with one insert_many.
+
+        Returns:
+            False if any message failed to persist (and was requeued or dead-lettered)
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return True
+
+            batch, self._pending = self._pending, []
+            self._inflight = batch
+            failed_ids = set()
+            try:
+                await db.db["chat_history"].insert_many(batch, ordered=False)
+                metrics.inc("chat_buffer_flushes_total")
+                metrics.inc("chat_buffer_flushed_messages_total", len(batch))
+            except BulkWriteError as e:
+                # Duplicate keys mean a previous attempt already landed those messages
+                failed_ids = {
+                    err["op"]["_id"] for err in e.details.get("writeErrors", [])
+                    if err.get("code") != 11000
+                }
+                if failed_ids:
+                    self._requeue([m for m in batch if m["_id"] in failed_ids])
+                    logger.warning(f"[ChatBuffer] {len(failed_ids)} messages were rejected by the server")
+            except asyncio.CancelledError:
+                # Shutdown interrupted the write; keep the batch for the final flush
+                self._pending = batch + self._pending
+                raise
+            except Exception as e:
+                failed_ids = {m["_id"] for m in batch}
+                self._requeue(batch)
+                metrics.inc("chat_buffer_flush_errors_total")
+                logger.warning(f"[ChatBuffer] Flush failed, will retry: {e}")
+            finally:
+                self._inflight = []
+
+            for msg in batch:
+                if msg["_id"] not in failed_ids:
+                    self._attempts.pop(msg["_id"], None)
+
+        async with self._cond:
+            metrics.set_gauge("chat_buffer_pending", self._size())
+            self._cond.notify_all()
+        return not failed_ids
+
+    async def _run(self):
+        failures = 0
+        while True:
+            async with self._cond:
+                try:
+                    await asyncio.wait_for(
+                        self._cond.wait_for(lambda: len(self._pending) >= self.flush_size),
+                        timeout=self.flush_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            if await self.flush():
+                failures = 0
+                continue
+
+            # Don't hammer a struggling database: back off before the next attempt
+            delay = min(self.retry_backoff * 2 ** failures, self.retry_backoff_max)
+            failures += 1
+            metrics.inc("chat_buffer_flush_backoffs_total")
+            await asyncio.sleep(delay)
+
+    def start(self):
+        if self._task:
+            return
+        self._cond = asyncio.Condition()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and persist whatever is still buffered."""
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        await self.flush()
+        if self._pending:
+            logger.warning(f"[ChatBuffer] Dropping {len(self._pending)} unsaved messages on shutdown")
+
+chat_write_buffer = ChatWriteBuffer()
 
 class ChatHistoryService:
     def __init__(self):
         self.collection = db.db["chat_history"]
 
     async def add_message(self, session_id: str, role: str, content: str, user_id: str = None):
-        message = {
-            "session_id": session_id,
-            "user_id": user_id,
-            "role": role,
-            "content": content,
-            "timestamp": datetime.utcnow()
-        }
-        await self.collection.insert_one(message)
+        await self.add_messages(session_id, [(role, content)], user_id=user_id)
+
+    async def add_messages(self, session_id: str, messages: List[Tuple[str, str]], user_id: str = None):
+        """
+        Save several (role, content) messages of one session in order.
+        Timestamps are spaced 1ms apart (Mongo date precision) so the order survives sorting.
+        """
+        now = datetime.utcnow()
+        docs = [
+            {
+                "_id": ObjectId(),
+                "session_id": session_id,
+                "user_id": user_id,
+                "role": role,
+                "content": content,
+                "timestamp": now + timedelta(milliseconds=i)
+            }
+            for i, (role, content) in enumerate(messages)
+        ]
+
+        if chat_write_buffer.running:
+            await chat_write_buffer.add(docs)
+        else:
+            await self.collection.insert_many(docs)
 
     async def get_history(self, session_id: str, limit: int = 20) -> List[Dict]:
-        """Retrieve conversation history with increased context window"""
-        cursor = self.collection.find({"session_id": session_id}).sort("timestamp", 1).limit(limit)
+        """Retrieve the most recent `limit` messages of a session, oldest first"""
+        cursor = self.collection.find({"session_id": session_id}).sort("timestamp", -1).limit(limit)
         history = await cursor.to_list(length=limit)
+
+        # Read-your-writes: include messages still sitting in the write buffer
+        seen = {msg["_id"] for msg in history}
+        history += [msg for msg in chat_write_buffer.buffered(session_id=session_id) if msg["_id"] not in seen]
+        history = sorted(history, key=lambda msg: msg["timestamp"])[-limit:]
+
         return [{"role": msg["role"], "content": msg["content"]} for msg in history]
 
+    async def get_messages_after(self, session_id: str, after: Optional[datetime] = None, limit: int = 50) -> List[Dict]:
+        """
+        Retrieve the most recent `limit` messages of a session newer than `after`,
+        oldest first. Includes buffered messages and keeps timestamps.
+        """
+        query = {"session_id": session_id}
+        if after is not None:
+            query["timestamp"] = {"$gt": after}
+
+        cursor = self.collection.find(query).sort("timestamp", -1).limit(limit)
+        messages = await cursor.to_list(length=limit)
+
+        seen = {msg["_id"] for msg in messages}
+        messages += [
+            msg for msg in chat_write_buffer.buffered(session_id=session_id)
+            if msg["_id"] not in seen and (after is None or msg["timestamp"] > after)
+        ]
+        messages = sorted(messages, key=lambda msg: msg["timestamp"])[-limit:]
+        return [{"role": msg["role"], "content": msg["content"], "timestamp": msg["timestamp"]} for msg in messages]
+
     async def get_recent_sessions(self, user_id: str, limit: int = 5) -> List[Dict]:
         """Get the last N active sessions for a user."""
         pipeline = [
@@ -37,4 +284,144 @@ class ChatHistoryService:
         ]
         cursor = self.collection.aggregate(pipeline)
         sessions = await cursor.to_list(length=limit)
+
+        # Fold in sessions whose latest messages are still buffered
+        buffered = chat_write_buffer.buffered(user_id=user_id)
+        if buffered:
+            by_session = {s["_id"]: s for s in sessions}
+            for msg in buffered:
+                current = by_session.get(msg["session_id"])
+                if current is None or msg["timestamp"] > current["timestamp"]:
+                    by_session[msg["session_id"]] = {
+                        "_id": msg["session_id"],
+                        "last_message": msg["content"],
+                        "timestamp": msg["timestamp"]
+                    }
+            sessions = sorted(by_session.values(), key=lambda s: s["timestamp"], reverse=True)[:limit]
+
         return [{"session_id": s["_id"], "preview": s["last_message"][:50] + "...", "timestamp": s["timestamp"]} for s in sessions]
+
+    async def find_stale_sessions(self, keep_sessions: int) -> Dict[str, List[str]]:
+        """
+        Find sessions beyond the most recent `keep_sessions` for every user.
+
+        Returns:
+            Mapping of user_id -> list of session_ids that should be pruned
+        """
+        pipeline = [
+            {"$match": {"user_id": {"$ne": None}}},
+            {"$group": {
+                "_id": {"user_id": "$user_id", "session_id": "$session_id"},
+                "last_activity": {"$max": "$timestamp"}
+            }},
+            {"$group": {
+                "_id": "$_id.user_id",
+                "sessions": {"$push": {"session_id": "$_id.session_id", "last_activity": "$last_activity"}},
+                "count": {"$sum": 1}
+            }},
+            {"$match": {"count": {"$gt": keep_sessions}}}
+        ]
+        stale = {}
+        async for user in self.collection.aggregate(pipeline, allowDiskUse=True):
+            sessions = sorted(user["sessions"], key=lambda s: s["last_activity"], reverse=True)
+            stale[user["_id"]] = [s["session_id"] for s in sessions[keep_sessions:]]
+        return stale
+
+    async def delete_sessions(self, session_ids: List[str], batch_size: int = 500) -> int:
+        """
+        Delete all messages of the given sessions in bounded batches, so a large
+        prune never holds the collection busy with one huge delete.
+        """
+        deleted = 0
+        while True:
+            cursor = self.collection.find(
+                {"session_id": {"$in": session_ids}},
+                projection={"_id": 1}
+            ).limit(batch_size)
+            ids = [doc["_id"] async for doc in cursor]
+            if not ids:
+                break
+
+            result = await self.collection.delete_many({"_id": {"$in": ids}})
+            deleted += result.deleted_count
+            # Yield to request handlers between batches
+            await asyncio.sleep(0)
+
+        await db.db["chat_summaries"].delete_many({"session_id": {"$in": session_ids}})
+        return deleted
+
+    async def collection_stats(self) -> Dict:
+        """Return size information for the chat_history collection."""
+        stats = await db.db.command("collStats", "chat_history")
+        return {
+            "count": stats.get("count", 0),
+            "size_bytes": stats.get("size", 0),
+            "storage_bytes": stats.get("storageSize", 0),
+            "index_bytes": stats.get("totalIndexSize", 0)
+        }
+
+class ChatRetentionPruner:
+    """
+    Background task enforcing the per-user session limit on chat_history.
+    Age-based expiry is handled by the TTL index created in Database.connect().
+    """
+
+    def __init__(
+        self,
+        keep_sessions: int = settings.CHAT_HISTORY_MAX_SESSIONS,
+        interval_seconds: int = settings.CHAT_HISTORY_PRUNE_INTERVAL_SECONDS,
+        batch_size: int = settings.CHAT_HISTORY_PRUNE_BATCH_SIZE
+    ):
+        self.keep_sessions = keep_sessions
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def prune_once(self) -> int:
+        """Run a single pruning pass. Returns the number of messages deleted."""
+        service = ChatHistoryService()
+        stale = await service.find_stale_sessions(self.keep_sessions)
+
+        pruned = 0
+        for user_id, session_ids in stale.items():
+            pruned += await service.delete_sessions(session_ids, batch_size=self.batch_size)
+
+        metrics.inc("chat_history_pruned_messages_total", pruned)
+        metrics.inc("chat_history_pruned_sessions_total", sum(len(s) for s in stale.values()))
+
+        try:
+            stats = await service.collection_stats()
+            for key, value in stats.items():
+                metrics.set_gauge(f"chat_history_{key}", value)
+        except Exception as e:
+            logger.warning(f"[Retention] Could not read collection stats: {e}")
+
+        if pruned:
+            logger.info(f"[Retention] Pruned {pruned} messages from {len(stale)} users")
+        return pruned
+
+    async def _run(self):
+        while True:
+            try:
+                await self.prune_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[Retention] Prune pass failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self.interval_seconds <= 0 or self.keep_sessions <= 0 or self._task:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+retention_pruner = ChatRetentionPruner()
@@ -0,0 +1,169 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+
+from app.core.config import settings
+from app.core.database import db
+from app.core.metrics import metrics
+from app.core.startup_profiler import lazy_import
+from app.core.llm_limiter import llm_limiter, LimiterTimeout, estimate_tokens
+from app.core.token_manager import token_manager
+from app.services.chat_history import ChatHistoryService
+from loguru import logger
+
+langchain_groq = lazy_import("langchain_groq")
+prompts = lazy_import("langchain_core.prompts")
+output_parsers = lazy_import("langchain_core.output_parsers")
+
+SUMMARY_HEADER = "Summary of earlier conversation:"
+
+def format_messages(messages: List[Dict]) -> str:
+    return "\n".join([f"{msg['role']}: {msg['content']}" for msg in messages])
+
+class ConversationSummaryService:
+    """
+    Keeps a rolling summary per chat session in the `chat_summaries` collection.
+
+    The prompt history is the stored summary plus every message newer than the
+    summary. Once those unsummarized messages exceed the token budget, a refresh
+    folds all but the last few of them into the summary in the background.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = settings.HISTORY_SUMMARY_TOKEN_BUDGET,
+        recent_messages: int = settings.HISTORY_RECENT_MESSAGES
+    ):
+        self.token_budget = token_budget
+        self.recent_messages = recent_messages
+        self._chain = None
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def chain(self):
+        if self._chain is None:
+            llm = langchain_groq.ChatGroq(
+                model=settings.HISTORY_SUMMARY_MODEL,
+                api_key=os.getenv("GROQ_API_KEY"),
+                temperature=0,
+                max_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS,
+                max_retries=1,
+                http_async_client=llm_limiter.http_client()
+            )
+            prompt = prompts.ChatPromptTemplate.from_messages([
+                ("system", """You maintain a running summary of a regulatory compliance conversation.
+Merge the existing summary with the new messages into one updated summary.
+Keep the user's goals, the regulations, clauses and documents discussed, compliance conclusions, and open questions.
+Drop greetings and repetition. Write at most 150 words of plain prose."""),
+                ("user", """Existing summary:
+{summary}
+
+New messages:
+{messages}""")
+            ])
+            self._chain = prompt | llm | output_parsers.StrOutputParser()
+        return self._chain
+
+    @property
+    def collection(self):
+        return db.db["chat_summaries"]
+
+    async def get_summary(self, session_id: str) -> Optional[Dict]:
+        return await self.collection.find_one({"session_id": session_id})
+
+    @staticmethod
+    def _message_tokens(msg: Dict) -> int:
+        # Same per-turn cost as TokenManager.history_tokens; cached, so old turns are not re-encoded
+        return token_manager.count_cached(f"{msg['role']}: {msg['content']}") + 1
+
+    def _within_budget(self, messages: List[Dict]) -> List[Dict]:
+        """The newest messages that fit the token budget, always keeping the last `recent_messages`."""
+        total, start = 0, len(messages)
+        while start > 0:
+            total += self._message_tokens(messages[start - 1])
+            if total > self.token_budget and len(messages) - start >= self.recent_messages:
+                break
+            start -= 1
+        return messages[start:]
+
+    async def build_history_context(self, session_id: str, max_messages: int = 50) -> str:
+        """
+        Return the prompt history for a session: rolling summary followed by recent turns.
+        Turns are capped at the summary token budget, which unsummarized history only
+        exceeds until the next refresh folds it in.
+        """
+        summary = await self.get_summary(session_id)
+        covered_until = summary["covered_until"] if summary else None
+
+        chat_service = ChatHistoryService()
+        messages = await chat_service.get_messages_after(session_id, after=covered_until, limit=max_messages)
+        messages = self._within_budget(messages)
+
+        recent = format_messages(messages)
+        if summary and summary.get("summary"):
+            header = f"{SUMMARY_HEADER}\n{summary['summary']}"
+            return f"{header}\n\n{recent}" if recent else header
+        return recent
+
+    def schedule_refresh(self, session_id: str, user_id: Optional[str] = None):
+        """Refresh the session summary in the background; at most one refresh per session at a time."""
+        if session_id in self._refreshing:
+            return
+        self._refreshing.add(session_id)
+        task = asyncio.create_task(self._refresh(session_id, user_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, session_id: str, user_id: Optional[str]):
+        try:
+            summary = await self.get_summary(session_id)
+            covered_until = summary["covered_until"] if summary else None
+
+            chat_service = ChatHistoryService()
+            messages = await chat_service.get_messages_after(session_id, after=covered_until, limit=200)
+
+            if len(messages) <= self.recent_messages:
+                return
+            if sum(self._message_tokens(msg) for msg in messages) <= self.token_budget:
+                return
+
+            to_fold = messages[:-self.recent_messages]
+            inputs = {
+                "summary": summary["summary"] if summary else "None yet.",
+                "messages": format_messages(to_fold)
+            }
+            # Background work: never queue long for capacity that user requests need
+            async with llm_limiter.acquire(
+                tokens=estimate_tokens(*inputs.values(), completion=settings.HISTORY_SUMMARY_MAX_TOKENS),
+                deadline=2.0
+            ):
+                new_summary = await self.chain.ainvoke(inputs)
+            new_summary = new_summary.strip()
+
+            await self.collection.update_one(
+                {"session_id": session_id},
+                {"$set": {
+                    "session_id": session_id,
+                    "user_id": user_id,
+                    "summary": new_summary,
+                    "covered_until": to_fold[-1]["timestamp"],
+                    "token_count": token_manager.count_tokens(new_summary),
+                    "updated_at": datetime.utcnow()
+                }},
+                upsert=True
+            )
+            metrics.inc("conversation_summary_refreshes_total")
+            logger.info(f"[Summary] Folded {len(to_fold)} messages into summary for session {session_id}")
+        except LimiterTimeout:
+            # Retried after the next turn
+            metrics.inc("conversation_summary_skipped_total")
+        except Exception as e:
+            metrics.inc("conversation_summary_errors_total")
+            logger.error(f"[Summary] Refresh failed for session {session_id}: {e}")
+        finally:
+            self._refreshing.discard(session_id)
+
+conversation_summary_service = ConversationSummaryService()
@@ -1,23 +1,36 @@
 import os
 from typing import List, Dict
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from app.core.token_manager import token_manager
+from app.core.startup_profiler import lazy_import
+from loguru import logger
+
+# PDF loaders and splitters pull in most of langchain_community; only ingestion needs them
+document_loaders = lazy_import("langchain_community.document_loaders")
+text_splitters = lazy_import("langchain_text_splitters")
 
 class DocumentProcessor:
     def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            separators=["\n\n", "\n", " ", ""]
-        )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self._text_splitter = None
+
+    @property
+    def text_splitter(self):
+        if self._text_splitter is None:
+            self._text_splitter = text_splitters.RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                separators=["\n\n", "\n", " ", ""]
+            )
+        return self._text_splitter
 
     async def process_file(self, file_path: str, metadata: Dict) -> List[Document]:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
 
         try:
-            loader = PyPDFLoader(file_path)
+            loader = document_loaders.PyPDFLoader(file_path)
             docs = loader.load()
             
             for doc in docs:
@@ -33,7 +46,7 @@ class DocumentProcessor:
             return enriched_chunks
             
         except Exception as e:
-            print(f"Error processing file {file_path}: {e}")
+            logger.error(f"Error processing file {file_path}: {e}")
             raise e
 
     def _enrich_chunk_context(self, chunk: Document, metadata: Dict) -> Document:
@@ -42,5 +55,7 @@ class DocumentProcessor:
         
         context_header = f"DOMARIN: REGULATORY_COMPLIANCE\nSOURCE_DOC: {source}\nDOC_TYPE: {doc_type}\nCONTEXT_LAYER: Global\n---\n"
         chunk.page_content = f"{context_header}{chunk.page_content}"
+        # Counted once here so context packing never re-encodes chunks per query
+        chunk.metadata["token_count"] = token_manager.count_tokens(chunk.page_content)
         
         return chunk
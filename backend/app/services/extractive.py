@@ -0,0 +1,81 @@
+import asyncio
+import re
+from typing import List, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.models.schemas import ComplianceAssessment, ComplianceSource
+
+# Enrichment headers added at ingest (see DocumentProcessor / ingest_kb) end with this line
+_HEADER_SEPARATOR = "\n---\n"
+_SECTION_LABEL = re.compile(r"^[A-Z_]+:\s*$")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[A-Z(\"'])")
+
+def _strip_header(text: str) -> str:
+    if _HEADER_SEPARATOR in text:
+        return text.split(_HEADER_SEPARATOR, 1)[1]
+    return text
+
+def split_sentences(docs: List[Document], max_sentences: int = 60) -> List[Tuple[str, Document]]:
+    """Split chunk bodies into candidate sentences, skipping section labels, bullets and fragments."""
+    sentences, seen = [], set()
+    for doc in docs:
+        body = _strip_header(doc.page_content)
+        for block in body.split("\n"):
+            block = block.strip()
+            if not block or _SECTION_LABEL.match(block) or block.startswith(("-", "{", "}", "\"")):
+                continue
+            for sentence in _SENTENCE_SPLIT.split(block):
+                sentence = sentence.strip()
+                if len(sentence) < 30 or sentence in seen:
+                    continue
+                seen.add(sentence)
+                sentences.append((sentence, doc))
+                if len(sentences) >= max_sentences:
+                    return sentences
+    return sentences
+
+def _rank(query_vector: List[float], sentences: List[str], embeddings) -> np.ndarray:
+    query_vec = np.asarray(query_vector, dtype=np.float32)
+    sentence_vecs = np.asarray(embeddings.embed_documents(sentences), dtype=np.float32)
+    norms = np.linalg.norm(sentence_vecs, axis=1) * (np.linalg.norm(query_vec) or 1.0)
+    return sentence_vecs @ query_vec / np.where(norms == 0, 1.0, norms)
+
+async def build_extractive_answer(query: str, docs: List[Document], vector_store, top_n: int = 3) -> ComplianceAssessment:
+    """
+    Degraded-mode answer: the retrieved sentences most similar to the query,
+    ranked by embedding cosine similarity. Marked "Needs Review" because no
+    LLM has reasoned over them.
+    """
+    candidates = split_sentences(docs)
+    if not candidates:
+        return ComplianceAssessment(
+            response="The assistant is taking longer than usual and no matching passages were found. Please try again shortly.",
+            status="Needs Review",
+            reasoning="LLM latency budget exceeded; no extractive content available.",
+            conversation_type="extractive"
+        )
+
+    # The query was embedded for retrieval, so this is a cache hit
+    query_vector = vector_store.embed_query(query)
+    # Embedding is CPU-bound (ONNX); keep it off the event loop
+    scores = await asyncio.to_thread(_rank, query_vector, [s for s, _ in candidates], vector_store.embeddings)
+    best = np.argsort(-scores)[:top_n]
+
+    picked = [(candidates[i][0], candidates[i][1], float(scores[i])) for i in best]
+    return ComplianceAssessment(
+        response=" ".join(sentence for sentence, _, _ in picked),
+        status="Needs Review",
+        reasoning="Extracted from the most relevant passages because the full analysis could not complete in time. Verify against the cited sources.",
+        relevant_clauses=[],
+        sources=[
+            ComplianceSource(
+                document_name=doc.metadata.get("title") or doc.metadata.get("source") or "Unknown Document",
+                excerpt=sentence,
+                relevance_score=round(score, 4)
+            )
+            for sentence, doc, score in picked
+        ],
+        conversation_type="extractive"
+    )
@@ -0,0 +1,102 @@
+import asyncio
+from typing import List, Optional, Set
+
+from app.core.config import settings
+from app.core.llm_limiter import llm_limiter, TokenBucket
+from app.core.metrics import metrics
+from app.core.ttl_cache import TTLCache
+from app.models.schemas import ComplianceAssessment
+from app.services.agent import get_compliance_agent, AgentDeps
+from app.services.conversation_summary import conversation_summary_service
+from loguru import logger
+
+def _normalize(question: str) -> str:
+    return " ".join(question.lower().split())
+
+class FollowUpPrefetcher:
+    """
+    Speculatively answers the follow-up questions suggested with a response,
+    so a click on one of them can be served from memory.
+
+    Nothing is prefetched while the shared LLM limiter is busy: not even
+    fast-path (KB) answers, whose history, embedding and search work would
+    still compete with real requests. LLM answers additionally draw on a
+    separate PREFETCH_TOKENS_PER_MINUTE budget.
+    """
+
+    def __init__(self):
+        self.cache = TTLCache(
+            "prefetch",
+            max_entries=settings.PREFETCH_MAX_ENTRIES,
+            ttl_seconds=settings.PREFETCH_TTL_SECONDS
+        )
+        self.budget = TokenBucket(settings.PREFETCH_TOKENS_PER_MINUTE)
+        self._tasks: Set[asyncio.Task] = set()
+
+    def get(self, user_id: str, session_id: str, question: str) -> Optional[ComplianceAssessment]:
+        """
+        Return a prefetched answer for this session's question, if any.
+        Answers are keyed by the user they were computed for (their namespaces
+        and history): a client-supplied session ID alone never matches.
+        """
+        result = self.cache.get((user_id, session_id, _normalize(question)))
+        return result.model_copy(deep=True) if result is not None else None
+
+    def _llm_gate(self, estimated_tokens: int) -> bool:
+        if llm_limiter.is_busy():
+            metrics.inc("prefetch_skipped_total", reason="busy")
+            return False
+        if self.budget.wait_time(estimated_tokens) > 0:
+            metrics.inc("prefetch_skipped_total", reason="budget")
+            return False
+        self.budget.consume(estimated_tokens)
+        return True
+
+    async def schedule(self, user_id: str, session_id: str, questions: List[str], deps: AgentDeps, persona: str):
+        """
+        Start prefetching `questions` for the session in the background.
+        Async so BackgroundTasks runs it on the event loop rather than in a worker thread.
+        """
+        if not settings.PREFETCH_ENABLED or not questions:
+            return
+        if llm_limiter.is_busy():
+            metrics.inc("prefetch_skipped_total", len(questions), reason="busy")
+            return
+        task = asyncio.create_task(self._prefetch(user_id, session_id, questions, deps, persona))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _prefetch(self, user_id: str, session_id: str, questions: List[str], deps: AgentDeps, persona: str):
+        # Includes the turn that suggested these questions (read-your-writes on the chat buffer)
+        history_context = await conversation_summary_service.build_history_context(session_id)
+        for position, question in enumerate(questions):
+            if llm_limiter.is_busy():
+                # Load arrived while prefetching: drop the rest, retrieval included
+                metrics.inc("prefetch_skipped_total", len(questions) - position, reason="busy")
+                return
+            key = (user_id, session_id, _normalize(question))
+            if key in self.cache:
+                continue
+            try:
+                result = await get_compliance_agent().run(
+                    question,
+                    deps=deps,
+                    history_context=history_context,
+                    persona=persona,
+                    llm_gate=self._llm_gate
+                )
+            except Exception as e:
+                logger.error(f"[Prefetch] Failed for '{question[:50]}': {e}")
+                continue
+
+            if result is None:
+                continue
+            self.cache.set(key, result.data)
+            metrics.inc("prefetch_stored_total", path=result.data.conversation_type)
+
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+followup_prefetcher = FollowUpPrefetcher()
@@ -1,76 +1,166 @@
+import asyncio
 import json
 import os
-from typing import List, Optional
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from loguru import logger
+
+class _FollowUpIndex:
+    """Immutable snapshot of the follow-up KB with lookup indexes."""
+
+    def __init__(self, data: Dict, mtime: Optional[float]):
+        self.data = data
+        self.mtime = mtime
+        self.by_kb_id: Dict[str, List[str]] = {}
+        self.by_category: Dict[str, List[str]] = {}
+        for mapping in data.get("followup_mappings", []):
+            questions = mapping.get("questions", [])
+            # First mapping wins, matching the original linear scan
+            if mapping.get("kb_entry_id"):
+                self.by_kb_id.setdefault(mapping["kb_entry_id"], questions)
+            if mapping.get("category"):
+                self.by_category.setdefault(mapping["category"], questions)
+        self.general: List[str] = data.get("general_followups", {}).get("questions", [])
+
+        # Every distinct question, embedded lazily for similarity suggestions
+        seen = set()
+        self.all_questions: List[str] = []
+        for mapping in data.get("followup_mappings", []):
+            for question in mapping.get("questions", []):
+                if question not in seen:
+                    seen.add(question)
+                    self.all_questions.append(question)
+        self.vectors: Optional[np.ndarray] = None
 
 class FollowUpService:
     """Service to manage and retrieve contextual follow-up questions"""
-    
-    def __init__(self, followup_kb_path: str = "data/followup_questions.json"):
+
+    def __init__(self, followup_kb_path: str = "data/followup_questions.json", reload_check_seconds: float = 2.0):
         self.followup_kb_path = followup_kb_path
-        self.followup_data = None
+        self.reload_check_seconds = reload_check_seconds
+        self._last_check = 0.0
+        self._reload_lock = threading.Lock()
+        self._embed_lock = threading.Lock()
+        self._index = _FollowUpIndex({"followup_mappings": [], "general_followups": {"questions": []}}, None)
         self._load_followup_kb()
-    
+
+    @property
+    def followup_data(self) -> Dict:
+        return self._index.data
+
+    @property
+    def version(self) -> Optional[float]:
+        """Changes whenever the follow-up KB is reloaded (file mtime)."""
+        return self._current().mtime
+
     def _load_followup_kb(self):
-        """Load the follow-up questions knowledge base"""
+        """Load the follow-up questions knowledge base and swap in a fresh index"""
         try:
             if os.path.exists(self.followup_kb_path):
+                mtime = os.path.getmtime(self.followup_kb_path)
                 with open(self.followup_kb_path, 'r', encoding='utf-8') as f:
-                    self.followup_data = json.load(f)
-                print(f"[FollowUpService] Loaded {len(self.followup_data.get('followup_mappings', []))} follow-up mappings")
+                    data = json.load(f)
+                # Single reference assignment: readers see either the old or the new index
+                self._index = _FollowUpIndex(data, mtime)
+                logger.info(f"[FollowUpService] Loaded {len(data.get('followup_mappings', []))} follow-up mappings")
             else:
-                print(f"[FollowUpService] Warning: {self.followup_kb_path} not found")
-                self.followup_data = {"followup_mappings": [], "general_followups": {"questions": []}}
+                logger.warning(f"[FollowUpService] Warning: {self.followup_kb_path} not found")
         except Exception as e:
-            print(f"[FollowUpService] Error loading follow-up KB: {e}")
-            self.followup_data = {"followup_mappings": [], "general_followups": {"questions": []}}
-    
+            # Keep serving the previous index if the file is mid-write or invalid
+            logger.error(f"[FollowUpService] Error loading follow-up KB: {e}")
+
+    def _current(self) -> _FollowUpIndex:
+        """Return the current index, reloading it if the file changed on disk."""
+        now = time.monotonic()
+        if now - self._last_check >= self.reload_check_seconds:
+            self._last_check = now
+            try:
+                mtime = os.path.getmtime(self.followup_kb_path)
+            except OSError:
+                mtime = None
+            if mtime is not None and mtime != self._index.mtime:
+                with self._reload_lock:
+                    if mtime != self._index.mtime:
+                        self._load_followup_kb()
+        return self._index
+
     def get_followup_questions(self, kb_entry_id: Optional[str] = None, max_questions: int = 3) -> List[str]:
         """
         Retrieve follow-up questions for a given KB entry ID
-        
+
         Args:
             kb_entry_id: The ID of the KB entry (e.g., "KB_DEF_001")
             max_questions: Maximum number of questions to return
-            
+
         Returns:
             List of follow-up questions
         """
-        if not self.followup_data:
-            return []
-        
+        index = self._current()
+
         # If we have a specific KB entry ID, try to find matching follow-ups
-        if kb_entry_id:
-            for mapping in self.followup_data.get("followup_mappings", []):
-                if mapping.get("kb_entry_id") == kb_entry_id:
-                    questions = mapping.get("questions", [])
-                    return questions[:max_questions]
-        
+        if kb_entry_id and kb_entry_id in index.by_kb_id:
+            return index.by_kb_id[kb_entry_id][:max_questions]
+
         # Fallback to general follow-up questions
-        general_questions = self.followup_data.get("general_followups", {}).get("questions", [])
-        return general_questions[:max_questions]
-    
+        return index.general[:max_questions]
+
     def get_followup_by_category(self, category: str, max_questions: int = 3) -> List[str]:
         """
         Retrieve follow-up questions by category
-        
+
         Args:
             category: The category (e.g., "definition", "process")
             max_questions: Maximum number of questions to return
-            
+
         Returns:
             List of follow-up questions
         """
-        if not self.followup_data:
-            return []
-        
-        for mapping in self.followup_data.get("followup_mappings", []):
-            if mapping.get("category") == category:
-                questions = mapping.get("questions", [])
-                return questions[:max_questions]
-        
+        index = self._current()
+        if category in index.by_category:
+            return index.by_category[category][:max_questions]
+
         # Fallback to general
-        general_questions = self.followup_data.get("general_followups", {}).get("questions", [])
-        return general_questions[:max_questions]
+        return index.general[:max_questions]
+
+    def ensure_embeddings(self, embeddings) -> _FollowUpIndex:
+        """Embed all follow-up questions of the current index (blocking; run off the event loop)."""
+        index = self._current()
+        if index.vectors is None and index.all_questions:
+            with self._embed_lock:
+                if index.vectors is None:
+                    vectors = np.asarray(embeddings.embed_documents(index.all_questions), dtype=np.float32)
+                    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                    index.vectors = vectors / np.where(norms == 0, 1.0, norms)
+        return index
+
+    async def suggest_for_query(self, query_vector: List[float], embeddings, max_questions: int = 2) -> List[str]:
+        """
+        Follow-up questions most similar to the query, for answers not tied to a KB entry.
+        Falls back to the general questions when nothing is similar enough.
+
+        Args:
+            query_vector: Embedding of the user's query
+            embeddings: Embedding model used to embed the follow-up questions
+            max_questions: Maximum number of questions to return
+        """
+        index = self._current()
+        if index.vectors is None:
+            index = await asyncio.to_thread(self.ensure_embeddings, embeddings)
+        if index.vectors is None:
+            return index.general[:max_questions]
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= (np.linalg.norm(query) or 1.0)
+        scores = index.vectors @ query
+        best = [i for i in np.argsort(-scores)[:max_questions] if scores[i] >= settings.FOLLOWUP_SUGGESTION_MIN_SIMILARITY]
+        if not best:
+            return index.general[:max_questions]
+        return [index.all_questions[i] for i in best]
 
 # Singleton instance
 followup_service = FollowUpService()
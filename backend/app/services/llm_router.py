@@ -0,0 +1,232 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import AsyncExitStack
+from typing import Any, AsyncContextManager, Awaitable, Callable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from loguru import logger
+
+class AllProvidersFailed(Exception):
+    """Raised when no provider could produce a result."""
+
+    def __init__(self, errors: List[Tuple[str, Exception]]):
+        self.errors = errors
+        detail = "; ".join(f"{name}: {err}" for name, err in errors) or "no provider available"
+        super().__init__(f"All LLM providers failed ({detail})")
+
+class ProviderStats:
+    """Rolling latency and error-rate window for one provider."""
+
+    def __init__(self, window: int = 100):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+
+    def record(self, latency: float, ok: bool):
+        if ok:
+            self.latencies.append(latency)
+        self.outcomes.append(ok)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures. After `reset_seconds`
+    a single probe request is let through (half-open); its outcome closes or
+    re-opens the breaker.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """A probe was cancelled without an outcome; allow another one."""
+        self._probing = False
+
+class LLMProvider:
+    """
+    A named LLM backend: an async callable taking the prompt and returning the result.
+
+    `gate`, if given, builds an async context manager (e.g. a local rate
+    limiter slot) that is entered before each call. Time spent and errors
+    raised in the gate are local queueing, so they are kept out of the
+    provider's latency stats and circuit breaker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        call: Callable[[str], Awaitable[Any]],
+        gate: Optional[Callable[[str], AsyncContextManager]] = None
+    ):
+        self.name = name
+        self.call = call
+        self.gate = gate
+        self.stats = ProviderStats()
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+            reset_seconds=settings.LLM_CIRCUIT_RESET_SECONDS
+        )
+
+class ProviderRouter:
+    """
+    Routes LLM calls across providers in preference order.
+
+    - Providers with an open circuit are skipped.
+    - A failed call fails over to the next provider immediately.
+    - With hedging enabled, if the current provider is slower than its own
+      `hedge_percentile` latency, the next provider is started in parallel
+      and the first successful answer wins.
+    """
+
+    def __init__(
+        self,
+        providers: List[LLMProvider],
+        hedge_enabled: bool = settings.LLM_HEDGE_ENABLED,
+        hedge_percentile: float = settings.LLM_HEDGE_PERCENTILE,
+        hedge_min_samples: int = settings.LLM_HEDGE_MIN_SAMPLES
+    ):
+        self.providers = providers
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+
+    def _hedge_delay(self, provider: LLMProvider) -> Optional[float]:
+        if not self.hedge_enabled or len(provider.stats.latencies) < self.hedge_min_samples:
+            return None
+        return provider.stats.percentile(self.hedge_percentile)
+
+    async def _call(self, provider: LLMProvider, prompt: str) -> Any:
+        async with AsyncExitStack() as stack:
+            if provider.gate is not None:
+                try:
+                    await stack.enter_async_context(provider.gate(prompt))
+                except BaseException:
+                    # Timed out or cancelled while queueing locally: no outcome for the provider
+                    provider.breaker.release()
+                    raise
+
+            start = time.perf_counter()
+            try:
+                result = await provider.call(prompt)
+            except asyncio.CancelledError:
+                # Lost a hedge race (or caller went away): not the provider's fault
+                provider.breaker.release()
+                raise
+            except Exception:
+                provider.stats.record(time.perf_counter() - start, ok=False)
+                provider.breaker.record_failure()
+                metrics.inc("llm_provider_calls_total", provider=provider.name, outcome="error")
+                raise
+
+            provider.stats.record(time.perf_counter() - start, ok=True)
+            provider.breaker.record_success()
+            metrics.inc("llm_provider_calls_total", provider=provider.name, outcome="success")
+            return result
+
+    async def run(self, prompt: str) -> Tuple[str, Any]:
+        """
+        Execute the prompt on the best available provider.
+
+        Returns:
+            (provider name, result)
+        """
+        queue = list(self.providers)
+        errors: List[Tuple[str, Exception]] = []
+        pending = {}
+        last_started: Optional[LLMProvider] = None
+
+        def start_next() -> bool:
+            nonlocal last_started
+            while queue:
+                provider = queue.pop(0)
+                if not provider.breaker.allow():
+                    metrics.inc("llm_provider_skipped_total", provider=provider.name)
+                    continue
+                pending[asyncio.ensure_future(self._call(provider, prompt))] = provider
+                last_started = provider
+                return True
+            return False
+
+        try:
+            start_next()
+
+            while pending:
+                timeout = self._hedge_delay(last_started) if queue else None
+                done, _ = await asyncio.wait(pending.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    logger.info(f"[ROUTER] {last_started.name} exceeded p{self.hedge_percentile:g} ({timeout:.2f}s), hedging")
+                    metrics.inc("llm_provider_hedges_total", provider=last_started.name)
+                    start_next()
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        return provider.name, task.result()
+                    errors.append((provider.name, task.exception()))
+                    logger.warning(f"[ROUTER] {provider.name} failed: {task.exception()}")
+
+                if not pending:
+                    start_next()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise AllProvidersFailed(errors)
+
+    def status(self) -> List[dict]:
+        """Per-provider health snapshot."""
+        return [
+            {
+                "provider": p.name,
+                "circuit": p.breaker.state,
+                "p50": p.stats.percentile(50),
+                "p95": p.stats.percentile(95),
+                "error_rate": round(p.stats.error_rate, 3),
+                "samples": len(p.stats.outcomes)
+            }
+            for p in self.providers
+        ]
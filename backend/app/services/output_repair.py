@@ -0,0 +1,150 @@
+"""
+Local recovery of ComplianceAssessment objects from imperfect LLM output.
+
+The LLM is asked for strict JSON but sometimes wraps it in markdown fences,
+adds prose around it, leaves trailing commas, uses Python literals, or
+returns fields in the wrong shape. These helpers fix what can be fixed
+without another LLM round trip.
+"""
+import ast
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from app.models.schemas import ComplianceAssessment, ComplianceSource
+
+class OutputRepairError(ValueError):
+    """Raised when no ComplianceAssessment can be recovered from the text."""
+    pass
+
+_FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+# Each fix-up pattern matches a quoted string first (group 1), so string values are left as they are
+_STRING_LITERAL = r"\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*'"
+_TRAILING_COMMA = re.compile(rf"({_STRING_LITERAL})|,\s*([}}\]])", re.DOTALL)
+_LINE_COMMENT = re.compile(rf"({_STRING_LITERAL})|^[ \t]*//[^\n]*", re.MULTILINE | re.DOTALL)
+_JSON_LITERAL = re.compile(rf"({_STRING_LITERAL})|\b(null|true|false)\b", re.DOTALL)
+_PYTHON_LITERALS = {"null": "None", "true": "True", "false": "False"}
+
+_STATUS_VALUES = {
+    "compliant": "Compliant",
+    "non-compliant": "Non-Compliant",
+    "non compliant": "Non-Compliant",
+    "noncompliant": "Non-Compliant",
+    "not compliant": "Non-Compliant",
+    "needs review": "Needs Review",
+    "needs-review": "Needs Review",
+    "review": "Needs Review",
+    "partially compliant": "Needs Review",
+}
+
+def strip_markdown_fences(text: str) -> str:
+    """Return the content of the first fenced code block, or the text unchanged."""
+    match = _FENCE_PATTERN.search(text)
+    return match.group(1).strip() if match else text.strip()
+
+def extract_json_object(text: str) -> Optional[str]:
+    """Return the first balanced {...} object in the text, ignoring braces inside strings."""
+    start = text.find("{")
+    while start != -1:
+        depth, in_string, escaped = 0, None, False
+        for i in range(start, len(text)):
+            ch = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == in_string:
+                    in_string = None
+            elif ch in ("\"", "'"):
+                in_string = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return text[start:i + 1]
+        start = text.find("{", start + 1)
+    return None
+
+def lenient_json_loads(text: str) -> Dict[str, Any]:
+    """Parse JSON, tolerating trailing commas, // comments and Python-style literals."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    cleaned = _LINE_COMMENT.sub(lambda m: m.group(1) or "", text)
+    cleaned = _TRAILING_COMMA.sub(lambda m: m.group(1) or m.group(2), cleaned)
+    try:
+        return json.loads(cleaned)
+    except json.JSONDecodeError:
+        pass
+
+    # Single quotes, None/True/False: valid Python literal syntax
+    python_literal = _JSON_LITERAL.sub(lambda m: m.group(1) or _PYTHON_LITERALS[m.group(2)], cleaned)
+    try:
+        value = ast.literal_eval(python_literal)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        # TypeError: unhashable keys; MemoryError/RecursionError: pathologically nested input
+        raise OutputRepairError("Output is not parseable as JSON")
+    if not isinstance(value, dict):
+        raise OutputRepairError("Output JSON is not an object")
+    return value
+
+def _as_str_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if isinstance(value, (list, tuple)):
+        return [str(v) if not isinstance(v, dict) else json.dumps(v) for v in value if v is not None]
+    return [str(value)]
+
+def _as_sources(value: Any) -> List[ComplianceSource]:
+    sources = []
+    for item in value if isinstance(value, list) else ([value] if value else []):
+        if isinstance(item, str):
+            sources.append(ComplianceSource(document_name=item, excerpt="", relevance_score=0.0))
+        elif isinstance(item, dict):
+            try:
+                score = float(item.get("relevance_score", item.get("score", 0.0)) or 0.0)
+            except (TypeError, ValueError):
+                score = 0.0
+            sources.append(ComplianceSource(
+                document_name=str(item.get("document_name") or item.get("name") or item.get("source") or "Unknown"),
+                excerpt=str(item.get("excerpt") or item.get("text") or ""),
+                relevance_score=score
+            ))
+    return sources
+
+def coerce_assessment(data: Dict[str, Any]) -> ComplianceAssessment:
+    """Coerce a loosely shaped dict into a valid ComplianceAssessment."""
+    data = {str(k).strip().lower(): v for k, v in data.items()}
+
+    response = data.get("response") or data.get("answer") or data.get("summary") or data.get("reasoning")
+    if not response:
+        raise OutputRepairError("Output has no response text")
+
+    status = data.get("status")
+    if status is not None:
+        status = _STATUS_VALUES.get(str(status).strip().lower())
+
+    reasoning = data.get("reasoning")
+    return ComplianceAssessment(
+        response=str(response),
+        status=status,
+        reasoning=str(reasoning) if reasoning is not None else None,
+        relevant_clauses=_as_str_list(data.get("relevant_clauses")),
+        sources=_as_sources(data.get("sources")),
+        conversation_type=str(data.get("conversation_type") or "analysis"),
+        follow_up_questions=_as_str_list(data.get("follow_up_questions"))
+    )
+
+def repair_assessment(text: str) -> ComplianceAssessment:
+    """Run the full local repair pipeline on raw LLM output."""
+    candidate = strip_markdown_fences(text)
+    json_text = extract_json_object(candidate) or extract_json_object(text)
+    if json_text is None:
+        raise OutputRepairError("No JSON object found in output")
+    return coerce_assessment(lenient_json_loads(json_text))
@@ -4,14 +4,18 @@ import re
 from typing import Optional
 from dotenv import load_dotenv
 
-from pydantic_ai import Agent
-from pydantic_ai.models.groq import GroqModel
-from pydantic_ai.models.openai import OpenAIModel
-
 from app.models.schemas import ComplianceAssessment, ComplianceSource
 from app.services.vector_store import VectorStoreService
 from app.services.chat_history import ChatHistoryService
 from app.services.followup_service import followup_service
+from app.services.llm_router import ProviderRouter, LLMProvider, AllProvidersFailed
+from app.core.llm_limiter import llm_limiter, estimate_tokens
+from app.core.startup_profiler import lazy_import
+
+# pydantic-ai and its model clients load only if this engine is used
+pydantic_ai = lazy_import("pydantic_ai")
+groq_models = lazy_import("pydantic_ai.models.groq")
+openai_models = lazy_import("pydantic_ai.models.openai")
 
 # Load environment variables
 load_dotenv()
@@ -26,20 +30,21 @@ logger.setLevel(logging.INFO)
 
 def get_primary_model():
     """Returns the primary Groq model."""
-    return GroqModel('llama-3.3-70b-versatile')
+    return groq_models.GroqModel('llama-3.3-70b-versatile')
 
 def get_fallback_model():
-    """Returns the fallback OpenRouter model."""
+    """Returns the fallback OpenRouter model, or None when no key is configured."""
     api_key = os.getenv("OPENROUTER_API_KEY")
     if not api_key:
         logger.warning("OPENROUTER_API_KEY not found.")
         return None
     
-    # Set environment variables for OpenAI-compatible client
-    os.environ["OPENAI_API_KEY"] = api_key
-    os.environ["OPENAI_BASE_URL"] = "https://openrouter.ai/api/v1"
-    
-    return OpenAIModel('meta-llama/llama-3.3-70b-instruct:free')
+    # Configure the OpenAI-compatible client directly instead of mutating os.environ
+    return openai_models.OpenAIModel(
+        'meta-llama/llama-3.3-70b-instruct:free',
+        base_url="https://openrouter.ai/api/v1",
+        api_key=api_key
+    )
 
 # ------------------------------------------------------------------
 # System Prompt (No Tool Calling - Prompt-Based)
@@ -79,12 +84,46 @@ IMPORTANT: The 'response' field is MANDATORY. Base your answer STRICTLY on the p
 # Agent Definition (NO TOOLS - Simplified)
 # ------------------------------------------------------------------
 
-compliance_agent = Agent(
-    model=get_primary_model(),
-    result_type=ComplianceAssessment,
-    system_prompt=system_prompt,
-    retries=1
-)
+def _build_primary_agent() -> "pydantic_ai.Agent":
+    return pydantic_ai.Agent(
+        model=get_primary_model(),
+        result_type=ComplianceAssessment,
+        system_prompt=system_prompt,
+        retries=1
+    )
+
+def _build_fallback_agent() -> Optional["pydantic_ai.Agent"]:
+    fallback_model = get_fallback_model()
+    if not fallback_model:
+        return None
+    return pydantic_ai.Agent(
+        model=fallback_model,
+        result_type=ComplianceAssessment,
+        system_prompt=system_prompt,
+        retries=1
+    )
+
+def _agent_call(agent: "pydantic_ai.Agent"):
+    async def call(user_prompt: str) -> ComplianceAssessment:
+        result = await agent.run(user_prompt)
+        return result.data
+    return call
+
+def _limiter_gate(user_prompt: str):
+    return llm_limiter.acquire(tokens=estimate_tokens(system_prompt, user_prompt))
+
+_router: Optional[ProviderRouter] = None
+
+def get_router() -> ProviderRouter:
+    """Provider router over the Groq agent and (if configured) the OpenRouter agent, built once."""
+    global _router
+    if _router is None:
+        providers = [LLMProvider("groq", _agent_call(_build_primary_agent()), gate=_limiter_gate)]
+        fallback_agent = _build_fallback_agent()
+        if fallback_agent:
+            providers.append(LLMProvider("openrouter", _agent_call(fallback_agent)))
+        _router = ProviderRouter(providers)
+    return _router
 
 # ------------------------------------------------------------------
 # Helper Functions
@@ -173,59 +212,33 @@ Current Query: {query}
 
 Return ONLY valid JSON matching the schema provided in the system prompt."""
     
-    # Execute with Primary Model (Groq)
+    # Build the provider router on first use (missing keys or packages fail here)
     try:
-        logger.info(f"[PRIMARY] Running Groq agent for query: {query[:50]}...")
-        result = await compliance_agent.run(user_prompt)
-        assessment = result.data
+        router = get_router()
+    except Exception as e:
+        logger.error(f"LLM providers could not be set up: {e}")
+        return _error_assessment(e)
+
+    # Execute through the provider router (Groq first, OpenRouter on failure or when hedging)
+    try:
+        logger.info(f"[ROUTER] Running agent for query: {query[:50]}...")
+        provider_name, assessment = await router.run(user_prompt)
         
         # Add follow-up questions
         assessment = _add_followup_questions(assessment, docs)
         
-        logger.info(f"[PRIMARY] Success - Status: {assessment.status}")
+        logger.info(f"[{provider_name.upper()}] Success - Status: {assessment.status}")
         return assessment
         
-    except Exception as e:
-        logger.error(f"Primary Agent failed: {e}. Attempting Fallback.")
-        
-        # FALLBACK LOGIC
-        fallback_model = get_fallback_model()
-        if not fallback_model:
-            logger.error("Fallback model not available (missing OPENROUTER_API_KEY)")
-            return ComplianceAssessment(
-                response="I apologize, but I am currently unable to process your request. Please try again later.",
-                status="Needs Review",
-                reasoning=f"System Error: {str(e)}",
-                conversation_type="error"
-            )
-        
-        try:
-            logger.info("[FALLBACK] Running OpenRouter agent...")
-            
-            # Create fallback agent
-            fallback_agent = Agent(
-                model=fallback_model,
-                result_type=ComplianceAssessment,
-                system_prompt=system_prompt,
-                retries=1
-            )
-            
-            result = await fallback_agent.run(user_prompt)
-            assessment = result.data
-            
-            # Add follow-up questions
-            assessment = _add_followup_questions(assessment, docs)
-            
-            logger.info(f"[FALLBACK] Success - Status: {assessment.status}")
-            return assessment
-            
-        except Exception as fallback_e:
-            logger.error(f"Fallback Agent also failed: {fallback_e}")
-            
-            # Safe Error Return
-            return ComplianceAssessment(
-                response="I apologize, but I am currently unable to process your request due to technical difficulties. Please try again in a moment.",
-                status="Needs Review",
-                reasoning=f"Primary Error: {str(e)} | Fallback Error: {str(fallback_e)}",
-                conversation_type="error"
-            )
+    except AllProvidersFailed as e:
+        logger.error(f"All providers failed: {e}")
+        return _error_assessment(e)
+
+def _error_assessment(error: Exception) -> ComplianceAssessment:
+    """Safe error return when no LLM answer could be produced."""
+    return ComplianceAssessment(
+        response="I apologize, but I am currently unable to process your request due to technical difficulties. Please try again in a moment.",
+        status="Needs Review",
+        reasoning=f"System Error: {str(error)}",
+        conversation_type="error"
+    )
@@ -1,25 +1,118 @@
 import os
 import pickle
-from typing import List, Tuple
-from langchain_community.vectorstores import FAISS
-# from langchain_community.embeddings import SentenceTransformerEmbeddings # Removed
-from langchain_community.embeddings import FastEmbedEmbeddings # Added
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
 from langchain_core.documents import Document
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.startup_profiler import lazy_import
+from loguru import logger
+
+# FAISS and FastEmbed load on first use (the startup warmup), not at import
+vectorstores = lazy_import("langchain_community.vectorstores")
+# from langchain_community.embeddings import SentenceTransformerEmbeddings # Removed
+embeddings_lib = lazy_import("langchain_community.embeddings") # FastEmbedEmbeddings
+faiss = lazy_import("faiss")
 # from sentence_transformers import CrossEncoder # Removed to save memory
 
+# Shared, read-only Golden KB (the original global index); every query searches it
+KB_NAMESPACE = "kb"
+# Uploads from before per-user namespaces whose owner is unknown (migrate_legacy_uploads.py); never searched
+LEGACY_NAMESPACE = "legacy_uploads"
+_NAMESPACE_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+# Metadata fields that search() can filter on
+FILTER_FIELDS = ("type", "category", "source")
+# Filtered subsets up to this size are scored directly instead of through a FAISS ID selector
+_DIRECT_SCORING_MAX_IDS = 4096
+
+def _active_filters(filters: Optional[Dict[str, Sequence[str]]]) -> Optional[Dict[str, Sequence[str]]]:
+    """Filters without the fields that list no values (an empty list does not filter)."""
+    active = {field: values for field, values in (filters or {}).items() if values}
+    return active or None
+
+def user_namespace(user_id: str) -> str:
+    """Namespace holding a user's uploaded documents."""
+    return f"user_{user_id}"
+
+def _index_bytes(vector_db) -> int:
+    """Rough resident size of a loaded index: vectors plus stored chunk text."""
+    vectors = vector_db.index.ntotal * vector_db.index.d * 4
+    # InMemoryDocstore keeps documents in _dict; there is no public iterator
+    text = sum(len(doc.page_content) for doc in vector_db.docstore._dict.values())
+    return vectors + text
+
+class _MetadataIndex:
+    """FAISS positions per value of each filterable metadata field, for one index."""
+
+    def __init__(self, vector_db):
+        # Positions are only meaningful for the index object they were read from
+        self.vector_db = vector_db
+        self.positions: Dict[str, Dict[str, List[int]]] = {field: {} for field in FILTER_FIELDS}
+        self._arrays: Dict[Tuple[str, str], np.ndarray] = {}
+        self.size = 0
+
+    def update(self):
+        """Index the positions added since the last update (FAISS only appends, so lists stay sorted)."""
+        vector_db = self.vector_db
+        for position in range(self.size, vector_db.index.ntotal):
+            doc = vector_db.docstore.search(vector_db.index_to_docstore_id[position])
+            for field in FILTER_FIELDS:
+                value = doc.metadata.get(field)
+                if value is not None:
+                    self.positions[field].setdefault(str(value), []).append(position)
+        self.size = vector_db.index.ntotal
+        self._arrays.clear()
+
+    def _array(self, field: str, value: str) -> np.ndarray:
+        array = self._arrays.get((field, value))
+        if array is None:
+            array = self._arrays[(field, value)] = np.asarray(self.positions[field].get(value, ()), dtype="int64")
+        return array
+
+    def select(self, filters: Dict[str, Sequence[str]]) -> np.ndarray:
+        """Sorted positions matching every field, each field matching any of its values."""
+        selected = None
+        for field, values in filters.items():
+            if field not in self.positions:
+                raise ValueError(f"Cannot filter on {field!r}; supported fields: {', '.join(FILTER_FIELDS)}")
+            arrays = [self._array(field, value) for value in values]
+            if not arrays:
+                continue
+            matched = arrays[0] if len(arrays) == 1 else np.unique(np.concatenate(arrays))
+            selected = matched if selected is None else np.intersect1d(selected, matched, assume_unique=True)
+            if len(selected) == 0:
+                break
+        return selected if selected is not None else np.empty(0, dtype="int64")
+
 class VectorStoreService:
     _instance = None
+    # The startup warmup builds the instance in a worker thread
+    _init_lock = threading.Lock()
 
-    def __new__(cls, index_path: str = "data/faiss_index"):
+    def __new__(cls, index_path: str = "data/faiss_index", embeddings=None):
         if cls._instance is None:
             cls._instance = super(VectorStoreService, cls).__new__(cls)
             cls._instance.initialized = False
         return cls._instance
 
-    def __init__(self, index_path: str = "data/faiss_index"):
+    def __init__(self, index_path: str = "data/faiss_index", embeddings=None):
+        """
+        Args:
+            index_path: Directory of the FAISS index
+            embeddings: Embedding model to use instead of FastEmbed (benchmarks); only
+                honoured by the first construction of the singleton
+        """
         if getattr(self, "initialized", False):
             return
-            
+        with self._init_lock:
+            if not getattr(self, "initialized", False):
+                self._initialize(index_path, embeddings)
+
+    def _initialize(self, index_path: str, embeddings=None):
         self.index_path = index_path
         
         # Switched to FastEmbed (ONNX) - <200MB RAM
@@ -30,7 +123,7 @@ class VectorStoreService:
         # However, if we want to reuse existing index, we need compatible dims (384).
         # BAAI/bge-small-en-v1.5 has 384 dims.
         # threads=1 is CRITICAL for 512MB RAM instances to prevent OOM
-        self.embeddings = FastEmbedEmbeddings(
+        self.embeddings = embeddings or embeddings_lib.FastEmbedEmbeddings(
             model_name="BAAI/bge-small-en-v1.5",
             threads=1,
             cache_dir="data/fastembed_cache"
@@ -41,50 +134,273 @@ class VectorStoreService:
         self.reranker = None
         
         self.vector_db = None
+        # Tenant namespaces loaded from disk, least recently used first, with their size
+        self._namespaces: "OrderedDict[str, Tuple[object, int]]" = OrderedDict()
+        self._namespace_lock = threading.Lock()
+        # Metadata side indexes per namespace, built on the first filtered search
+        self._metadata: Dict[str, _MetadataIndex] = {}
+        # Recent query embeddings, reused by search, extractive answers and follow-up suggestions
+        self._query_vectors: "OrderedDict[str, List[float]]" = OrderedDict()
+        # search_batch runs in a worker thread alongside searches on the event loop
+        self._query_lock = threading.Lock()
         self._load_index()
         self.initialized = True
 
     def _load_index(self):
         if os.path.exists(self.index_path):
             try:
-                self.vector_db = FAISS.load_local(
+                self.vector_db = vectorstores.FAISS.load_local(
                     self.index_path, 
                     self.embeddings, 
                     allow_dangerous_deserialization=True
                 )
-                print("Loaded existing FAISS index.")
+                logger.info("Loaded existing FAISS index.")
+                self._warn_legacy_uploads()
             except Exception as e:
-                print(f"Failed to load index: {e}. Creating new one.")
+                logger.error(f"Failed to load index: {e}. Creating new one.")
                 self.vector_db = None
         else:
-            print("No existing index found. Starting fresh.")
+            logger.info("No existing index found. Starting fresh.")
         
         # Explicit garbage collection to free up memory after initialization
         import gc
         gc.collect()
 
-    def add_documents(self, documents: List[Document]):
+    def _warn_legacy_uploads(self):
+        """Uploads indexed into the shared KB before per-user namespaces are visible to every user."""
+        legacy = sum(1 for doc in self.vector_db.docstore._dict.values() if doc.metadata.get("type") != "kb_entry")
+        if legacy:
+            logger.warning(
+                f"{legacy} chunks in the shared KB index are not KB entries (uploads from before per-user "
+                f"namespaces) and are returned to every user; run migrate_legacy_uploads.py to move them out"
+            )
+
+    def _namespace_path(self, namespace: str) -> str:
+        if not _NAMESPACE_PATTERN.match(namespace):
+            raise ValueError(f"Invalid namespace: {namespace!r}")
+        return os.path.join(settings.VECTOR_TENANT_INDEX_DIR, namespace)
+
+    def _get_namespace(self, namespace: str):
+        """Index of a tenant namespace, loaded on first use; None if it has no documents yet."""
+        with self._namespace_lock:
+            entry = self._namespaces.get(namespace)
+            if entry is not None:
+                self._namespaces.move_to_end(namespace)
+                return entry[0]
+
+        path = self._namespace_path(namespace)
+        if not os.path.exists(path):
+            return None
+        with metrics.time("namespace_load"):
+            vector_db = vectorstores.FAISS.load_local(path, self.embeddings, allow_dangerous_deserialization=True)
+        metrics.inc("vector_namespace_loads_total")
+        self._cache_namespace(namespace, vector_db)
+        return vector_db
+
+    def _cache_namespace(self, namespace: str, vector_db):
+        """Mark a namespace as most recently used and evict others past the memory budget."""
+        budget = settings.VECTOR_TENANT_MEMORY_BUDGET_MB * 2**20
+        with self._namespace_lock:
+            self._namespaces[namespace] = (vector_db, _index_bytes(vector_db))
+            self._namespaces.move_to_end(namespace)
+            total = sum(size for _, size in self._namespaces.values())
+            # The namespace just used stays loaded even if it alone exceeds the budget
+            while total > budget and len(self._namespaces) > 1:
+                evicted, (_, size) = self._namespaces.popitem(last=False)
+                self._metadata.pop(evicted, None)
+                total -= size
+                metrics.inc("vector_namespace_evictions_total")
+                logger.info(f"Evicted namespace {evicted} ({size / 2**20:.1f} MB) from memory")
+            metrics.set_gauge("vector_namespaces_loaded", len(self._namespaces))
+            metrics.set_gauge("vector_namespace_memory_bytes", total)
+
+    def _add_to(self, vector_db, documents: List[Document], vectors: Optional[Sequence[Sequence[float]]]):
+        """Add documents to an index (a new one if `vector_db` is None), embedding them unless `vectors` is given."""
+        if vectors is None:
+            if vector_db is None:
+                return vectorstores.FAISS.from_documents(documents, self.embeddings)
+            vector_db.add_documents(documents)
+            return vector_db
+
+        text_embeddings = [(doc.page_content, list(vector)) for doc, vector in zip(documents, vectors)]
+        metadatas = [doc.metadata for doc in documents]
+        if vector_db is None:
+            return vectorstores.FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas)
+        vector_db.add_embeddings(text_embeddings, metadatas=metadatas)
+        return vector_db
+
+    def add_documents(
+        self,
+        documents: List[Document],
+        namespace: str = KB_NAMESPACE,
+        vectors: Optional[Sequence[Sequence[float]]] = None
+    ):
+        """
+        Index documents into a namespace: the shared KB (ingest_kb.py) or a
+        tenant's own index under VECTOR_TENANT_INDEX_DIR (uploads).
+
+        Args:
+            vectors: Embeddings of `documents`, when already known (migrations);
+                skips embedding them again
+        """
         if not documents:
             return
 
-        if self.vector_db is None:
-            self.vector_db = FAISS.from_documents(documents, self.embeddings)
-        else:
-            self.vector_db.add_documents(documents)
-        
+        if namespace != KB_NAMESPACE:
+            vector_db = self._add_to(self._get_namespace(namespace), documents, vectors)
+            vector_db.save_local(self._namespace_path(namespace))
+            self._cache_namespace(namespace, vector_db)
+            return
+
+        self.vector_db = self._add_to(self.vector_db, documents, vectors)
         self.save_index()
 
-    def search(self, query: str, k: int = 4) -> List[Document]:
-        if self.vector_db is None:
+    def _remember_query_vector(self, query: str, vector: List[float]):
+        with self._query_lock:
+            self._query_vectors[query] = vector
+            if len(self._query_vectors) > 256:
+                self._query_vectors.popitem(last=False)
+
+    def _cached_query_vector(self, query: str) -> Optional[List[float]]:
+        with self._query_lock:
+            vector = self._query_vectors.get(query)
+            if vector is not None:
+                self._query_vectors.move_to_end(query)
+            return vector
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query, reusing the vector for recently seen queries."""
+        vector = self._cached_query_vector(query)
+        if vector is None:
+            vector = self.embeddings.embed_query(query)
+            self._remember_query_vector(query, vector)
+        return vector
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries in one model call, reusing the vectors of recently seen ones."""
+        missing = list(dict.fromkeys(query for query in queries if query not in self._query_vectors))
+        # FastEmbed embeds queries and passages the same way for this model
+        fresh = dict(zip(missing, self.embeddings.embed_documents(missing))) if missing else {}
+        for query, vector in fresh.items():
+            self._remember_query_vector(query, vector)
+        return [fresh[query] if query in fresh else self.embed_query(query) for query in queries]
+
+    def _indexes(self, namespaces: Optional[Sequence[str]]) -> List[Tuple[str, object]]:
+        """(namespace, index) pairs to search: the shared KB plus the given tenant namespaces that exist."""
+        indexes = [(KB_NAMESPACE, self.vector_db)] + [
+            (ns, self._get_namespace(ns)) for ns in namespaces or () if ns != KB_NAMESPACE
+        ]
+        return [(ns, index) for ns, index in indexes if index is not None]
+
+    def _filtered_search(self, namespace: str, vector_db, vector: List[float], k: int, filters: Dict[str, Sequence[str]]):
+        """(doc, L2 distance) pairs among the chunks matching `filters`, at a cost proportional to the subset."""
+        metadata = self._metadata.get(namespace)
+        if metadata is None or metadata.vector_db is not vector_db:
+            metadata = self._metadata[namespace] = _MetadataIndex(vector_db)
+        if metadata.size < vector_db.index.ntotal:
+            metadata.update()
+
+        ids = metadata.select(filters)
+        if len(ids) == 0:
+            return []
+        query = np.asarray([vector], dtype="float32")
+        if len(ids) <= _DIRECT_SCORING_MAX_IDS:
+            # Small subsets: score just their vectors
+            distances = ((vector_db.index.reconstruct_batch(ids) - query) ** 2).sum(axis=1)
+            top = np.argsort(distances)[:k]
+            positions, scores = ids[top], distances[top]
+        else:
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(ids))
+            scores, positions = vector_db.index.search(query, k, params=params)
+            positions, scores = positions[0], scores[0]
+
+        return [
+            (vector_db.docstore.search(vector_db.index_to_docstore_id[position]), float(score))
+            for position, score in zip(positions, scores)
+            if position >= 0
+        ]
+
+    def search(
+        self,
+        query: str,
+        k: int = 4,
+        namespaces: Optional[Sequence[str]] = None,
+        filters: Optional[Dict[str, Sequence[str]]] = None
+    ) -> List[Document]:
+        """
+        Top-k chunks from the shared KB plus the given tenant namespaces,
+        so search cost follows the caller's corpus rather than the deployment's.
+
+        Args:
+            filters: Only return chunks whose metadata matches, e.g.
+                {"type": ["kb_entry"]} or {"source": ["report.pdf"]}. Fields
+                (FILTER_FIELDS) are ANDed, the values of one field ORed. A field
+                with no values does not filter.
+        """
+        filters = _active_filters(filters)
+        indexes = self._indexes(namespaces)
+        if not indexes:
             return []
         
         # 1. Standard Vector Search (Fast, low RAM)
         # We removed reranking to fit in 512MB RAM
-        candidates_with_scores = self.vector_db.similarity_search_with_score(query, k=k)
+        with metrics.time("embed"):
+            vector = self.embed_query(query)
+        with metrics.time("faiss_search"):
+            candidates_with_scores = [
+                candidate
+                for ns, index in indexes
+                for candidate in (
+                    self._filtered_search(ns, index, vector, k, filters) if filters
+                    else index.similarity_search_with_score_by_vector(vector, k=k)
+                )
+            ]
+        
+        # Merge namespaces by L2 distance (same embedder everywhere, so scores are comparable)
+        if len(indexes) > 1:
+            candidates_with_scores = sorted(candidates_with_scores, key=lambda pair: pair[1])[:k]
         
         # Return docs directly
         return [doc for doc, score in candidates_with_scores]
 
+    def search_batch(
+        self,
+        queries: List[str],
+        k: int = 4,
+        namespaces: Optional[Sequence[str]] = None,
+        filters: Optional[Dict[str, Sequence[str]]] = None
+    ) -> List[List[Document]]:
+        """
+        search() for several queries at once: one embedding call for all of
+        them and one FAISS search per index (per query when filtered).
+        """
+        filters = _active_filters(filters)
+        indexes = self._indexes(namespaces)
+        if not indexes or not queries:
+            return [[] for _ in queries]
+
+        with metrics.time("embed"):
+            vectors = self.embed_queries(queries)
+        with metrics.time("faiss_search"):
+            candidates = [[] for _ in queries]
+            for ns, index in indexes:
+                if filters:
+                    for i, vector in enumerate(vectors):
+                        candidates[i].extend(self._filtered_search(ns, index, vector, k, filters))
+                    continue
+                scores, positions = index.index.search(np.asarray(vectors, dtype="float32"), k)
+                for i in range(len(queries)):
+                    candidates[i].extend(
+                        (index.docstore.search(index.index_to_docstore_id[position]), float(score))
+                        for position, score in zip(positions[i], scores[i])
+                        if position >= 0
+                    )
+
+        # Same merge as search(): namespaces by L2 distance
+        if len(indexes) > 1:
+            candidates = [sorted(pairs, key=lambda pair: pair[1])[:k] for pairs in candidates]
+        return [[doc for doc, score in pairs] for pairs in candidates]
+
     def save_index(self):
         if self.vector_db:
             self.vector_db.save_local(self.index_path)
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from app.core.database import db
+from app.core.readiness import readiness
+from app.core.startup_profiler import startup_profiler
+from app.services.agent import get_compliance_agent
+from app.services.chat_history import retention_pruner, chat_write_buffer
+from app.services.followup_service import followup_service
+from app.services.vector_store import VectorStoreService
+from loguru import logger
+
+WARMUP_QUERY = "What are the KYC requirements for opening a bank account?"
+
+async def _retry(step, *components: str, max_backoff: float = 60.0):
+    """Run `step` until it succeeds, recording errors against the first of `components` not yet ready."""
+    backoff = 2.0
+    while True:
+        try:
+            return await step()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            component = next((c for c in components if not readiness.is_ready(c)), components[-1])
+            readiness.mark_failed(component, e)
+            logger.warning(f"[Warmup] {component} not ready: {e}. Retrying in {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
+
+async def _connect_mongo():
+    with startup_profiler.time_init("mongo_connect"):
+        await db.connect()
+
+async def _warm_mongo():
+    await _retry(_connect_mongo, "mongo")
+    chat_write_buffer.start()
+    retention_pruner.start()
+    readiness.mark_ready("mongo")
+
+def _load_models():
+    start = time.perf_counter()
+    with startup_profiler.time_init("vector_store"):
+        vector_store = VectorStoreService()
+
+    # One real embedding pages the ONNX model in, so the first user query doesn't pay for it
+    with startup_profiler.time_init("embedder_warmup"):
+        vector = vector_store.embeddings.embed_query(WARMUP_QUERY)
+    # Follow-up suggestions for non-KB answers need the whole question bank embedded
+    with startup_profiler.time_init("followup_embeddings"):
+        followup_service.ensure_embeddings(vector_store.embeddings)
+    readiness.mark_ready("embedder")
+
+    with startup_profiler.time_init("index_warmup"):
+        if vector_store.vector_db is not None:
+            vector_store.vector_db.similarity_search_by_vector(vector, k=1)
+    readiness.mark_ready("index")
+
+    with startup_profiler.time_init("compliance_agent"):
+        agent = get_compliance_agent()
+    with startup_profiler.time_init("fast_path_precompute"):
+        agent.precompute_fast_path(vector_store)
+    readiness.mark_ready("llm_client")
+    logger.info(f"[Warmup] Models ready in {time.perf_counter() - start:.1f}s")
+
+async def _warm_models():
+    await _retry(lambda: asyncio.to_thread(_load_models), "embedder", "index", "llm_client")
+
+async def warm_up():
+    """Initialize Mongo and the heavy model components concurrently after startup."""
+    await asyncio.gather(_warm_mongo(), _warm_models())
+    logger.info("[Warmup] All components ready")
+    startup_profiler.report()
@@ -0,0 +1,84 @@
+"""
+Shared fixtures for the benchmarks: Golden KB documents, labeled queries
+and embeddings, built the same way as `ingest_kb.py`.
+"""
+import os
+import random
+import sys
+from typing import List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document
+
+from app.core.token_manager import token_manager
+from ingest_kb import KB_FILE_PATH, load_kb_entries, format_entry_to_text
+
+EMBEDDING_DIM = 384  # BAAI/bge-small-en-v1.5
+
+def make_embeddings(fake: bool = False):
+    """FastEmbed as in production, or a deterministic fake that needs no model download."""
+    if fake:
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        return DeterministicFakeEmbedding(size=EMBEDDING_DIM)
+    from langchain_community.embeddings import FastEmbedEmbeddings
+    return FastEmbedEmbeddings(model_name="BAAI/bge-small-en-v1.5", threads=1, cache_dir="data/fastembed_cache")
+
+def kb_documents(kb_path: str = KB_FILE_PATH) -> List[Document]:
+    """Golden KB entries as indexed by ingest_kb.py."""
+    kb_data = load_kb_entries(kb_path)
+    documents = []
+    for entry in kb_data.get("entries", []):
+        text_content = format_entry_to_text(entry, kb_data)
+        documents.append(Document(page_content=text_content, metadata={
+            "id": entry.get("id"),
+            "category": entry.get("category"),
+            "title": entry.get("title"),
+            "source": kb_data.get("source_document", {}).get("title"),
+            "type": "kb_entry",
+            "token_count": token_manager.count_tokens(text_content)
+        }))
+    return documents
+
+def labeled_queries(kb_path: str = KB_FILE_PATH) -> List[Tuple[str, str]]:
+    """(question intent, KB entry id) pairs: each intent's ground truth is its own entry."""
+    kb_data = load_kb_entries(kb_path)
+    return [
+        (intent, entry["id"])
+        for entry in kb_data.get("entries", [])
+        for intent in entry.get("question_intents", [])
+    ]
+
+_VOCABULARY = (
+    "audit compliance regulation clause authority entity report deviation control evidence "
+    "procurement expenditure sanction approval rule order instruction accountability transparency "
+    "governance risk sample observation finding remedy disclosure contract payment receipt asset "
+    "inspection assessment criteria propriety record ledger officer department scheme fund grant"
+).split()
+
+def synthetic_chunks(count: int, seed: int = 0, words: int = 120) -> List[Document]:
+    """Uploaded-PDF-like chunks (type "pdf") with enrichment headers and token counts."""
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(count):
+        body = " ".join(rng.choice(_VOCABULARY) for _ in range(words)).capitalize() + "."
+        source = f"synthetic_{i // 50}.pdf"
+        text = f"SOURCE: {source}\nPAGE: {i % 50}\nTYPE: pdf\n---\n{body}"
+        chunks.append(Document(page_content=text, metadata={
+            "source": source,
+            "page": i % 50,
+            "type": "pdf",
+            "token_count": token_manager.count_tokens(text)
+        }))
+    return chunks
+
+def build_vector_store(index_path: str, embeddings, filler_chunks: int = 0):
+    """
+    The VectorStoreService singleton over a fresh index at `index_path`: the
+    Golden KB plus `filler_chunks` synthetic document chunks.
+    """
+    from app.services.vector_store import VectorStoreService
+    vector_store = VectorStoreService(index_path=index_path, embeddings=embeddings)
+    if vector_store.vector_db is None:
+        vector_store.add_documents(kb_documents() + synthetic_chunks(filler_chunks))
+    return vector_store
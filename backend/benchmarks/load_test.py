@@ -0,0 +1,216 @@
+"""
+Offline end-to-end load test of the API.
+
+Boots the real FastAPI app in-process with:
+- mongomock-motor instead of MongoDB
+- a fake LLM with configurable latency instead of Groq
+- a FAISS index of the Golden KB plus synthetic PDF chunks in a temp dir
+  (FastEmbed, or a deterministic fake embedding with --fake-embeddings for
+  fully offline runs)
+
+Virtual users send /query requests (KB intents, which mostly hit the fast
+path, mixed with open questions that go to the LLM) and read their history.
+/query/stream is exercised too when the route exists. Latency percentiles,
+throughput, error counts and RSS are printed as JSON so CI can compare runs.
+
+Usage (from backend/):
+    python -m benchmarks.load_test [--users 20] [--requests-per-user 20] \
+        [--llm-latency-ms 800] [--fake-embeddings] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from loguru import logger
+from mongomock_motor import AsyncMongoMockClient
+
+import main
+from app.core.auth import create_access_token
+from app.core.database import db
+from app.core.llm_limiter import llm_limiter, TokenBucket
+from app.core.readiness import readiness
+from app.services import agent as agent_module
+from app.services.agent import ComplianceAgent
+from app.services.chat_history import chat_write_buffer
+from app.services.conversation_summary import conversation_summary_service
+from app.services.followup_prefetcher import followup_prefetcher
+from benchmarks.fake_llm import fake_chat_model
+from benchmarks.kb_fixture import build_vector_store, labeled_queries, make_embeddings
+
+OPEN_QUESTIONS = [
+    "Does our vendor onboarding process need a compliance review?",
+    "How should we document exceptions found during the audit?",
+    "What evidence is needed to show a policy was followed last year?",
+    "Are email approvals acceptable for procurement sign-off?",
+    "How do we report a deviation discovered after the audit closed?",
+]
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def rss_mb() -> Dict[str, float]:
+    with open("/proc/self/statm") as f:
+        current_pages = int(f.read().split()[1])
+    return {
+        "current": round(current_pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1),
+        "peak": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+async def setup(args, index_dir: str):
+    """Wire the app to the stand-ins and mark it ready, in place of the startup warmup."""
+    db.client = AsyncMongoMockClient()
+    db.db = db.client["compliance_rag_db"]
+
+    vector_store = build_vector_store(
+        os.path.join(index_dir, "faiss_index"),
+        make_embeddings(fake=args.fake_embeddings),
+        filler_chunks=args.filler_chunks
+    )
+
+    agent = ComplianceAgent(llm=fake_chat_model(args.llm_latency_ms, args.llm_jitter_ms, seed=args.seed))
+    agent.precompute_fast_path(vector_store)
+    agent_module._compliance_agent = agent
+    conversation_summary_service._chain = fake_chat_model(args.llm_latency_ms, args.llm_jitter_ms) | (lambda m: m.content)
+
+    if not args.respect_rate_limits:
+        # Groq free-tier budgets would make the fake LLM the only thing measured
+        llm_limiter.requests = TokenBucket(10**9)
+        llm_limiter.tokens = TokenBucket(10**12)
+
+    chat_write_buffer.start()
+    for component in readiness.COMPONENTS:
+        readiness.mark_ready(component)
+
+async def create_users(count: int) -> List[Dict]:
+    users = []
+    for i in range(count):
+        user_id = f"bench-user-{i}"
+        email = f"bench{i}@example.com"
+        await db.db.users.insert_one({"id": user_id, "email": email, "full_name": f"Bench {i}", "agent_persona": "strict_formal"})
+        token = create_access_token({"sub": email, "user_id": user_id})
+        users.append({"user_id": user_id, "headers": {"Authorization": f"Bearer {token}"}})
+    return users
+
+async def run_load(args) -> Dict:
+    intents = [query for query, _ in labeled_queries()]
+    rng = random.Random(args.seed)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    paths: Dict[str, int] = defaultdict(int)
+    has_stream = any(getattr(route, "path", "") == "/api/v1/query/stream" for route in main.app.routes)
+
+    users = await create_users(args.users)
+    transport = httpx.ASGITransport(app=main.app)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def timed(name: str, method: str, url: str, **kwargs):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, url, **kwargs)
+                except Exception:
+                    errors[name] += 1
+                    return None
+                latencies[name].append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors[name] += 1
+                return response
+
+        async def virtual_user(user: Dict):
+            session_id = None
+            for _ in range(args.requests_per_user):
+                use_open = rng.random() < args.open_question_ratio
+                query = rng.choice(OPEN_QUESTIONS if use_open else intents)
+                body = {"query": query, **({"session_id": session_id} if session_id else {})}
+
+                response = await timed("query", "POST", "/api/v1/query/", json=body, headers=user["headers"])
+                if response is not None and response.status_code == 200:
+                    payload = response.json()
+                    session_id = payload["session_id"]
+                    paths[payload["data"].get("conversation_type") or "unknown"] += 1
+
+                if has_stream:
+                    await timed("query_stream", "POST", "/api/v1/query/stream", json=body, headers=user["headers"])
+                if session_id:
+                    await timed("history", "GET", f"/api/v1/query/history/{session_id}", headers=user["headers"])
+                await timed("history_sessions", "GET", "/api/v1/query/history/sessions", headers=user["headers"])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(virtual_user(user) for user in users))
+        elapsed = time.perf_counter() - start
+
+    await followup_prefetcher.stop()
+    await chat_write_buffer.stop()
+
+    total = sum(len(v) for v in latencies.values())
+    return {
+        "config": {
+            "users": args.users,
+            "requests_per_user": args.requests_per_user,
+            "concurrency": args.concurrency,
+            "llm_latency_ms": args.llm_latency_ms,
+            "open_question_ratio": args.open_question_ratio,
+            "fake_embeddings": args.fake_embeddings,
+            "filler_chunks": args.filler_chunks,
+            "query_stream": has_stream
+        },
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(total / elapsed, 1),
+        "endpoints": {
+            name: {
+                "requests": len(values),
+                "errors": errors.get(name, 0),
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "p99_ms": round(percentile(values, 99) * 1000, 1)
+            }
+            for name, values in ((name, latencies.get(name, [])) for name in sorted(set(latencies) | set(errors)))
+        },
+        "answer_types": dict(paths),
+        "rss_mb": rss_mb()
+    }
+
+async def amain():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--requests-per-user", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=50, help="Max requests in flight")
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200)
+    parser.add_argument("--open-question-ratio", type=float, default=0.3, help="Share of queries that are not KB intents")
+    parser.add_argument("--fake-embeddings", action="store_true", help="Skip the FastEmbed model download")
+    parser.add_argument("--filler-chunks", type=int, default=500, help="Synthetic non-KB chunks in the index (LLM path)")
+    parser.add_argument("--respect-rate-limits", action="store_true", help="Keep the Groq request/token budgets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        await setup(args, index_dir)
+        results = await run_load(args)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    asyncio.run(amain())
@@ -0,0 +1,241 @@
+"""
+Microbenchmarks for the hot-path building blocks, with stored baselines.
+
+Each case times one function on synthetic data, timeit-style: the loop
+count is calibrated so a round takes at least --min-time, GC is off while
+timing, and the median per-call time over --rounds rounds is reported.
+
+    count_tokens_*            TokenManager.count_tokens
+    history_tokens            TokenManager.history_tokens on a 20-turn history (turn counts cached,
+                              as on every request after the first in a session)
+    pack_context_*            TokenManager.pack_context (history fits / history is trimmed)
+    kb_content_regex          KB_CONTENT_PATTERN extraction used by the fast path
+    build_kb_answer           ComplianceAgent._build_kb_answer (regex + follow-ups)
+    followup_questions        FollowUpService.get_followup_questions
+    enrich_chunk_context      DocumentProcessor._enrich_chunk_context
+    decode_token              auth.decode_token
+    get_current_user          auth.get_current_user
+    vector_search_<n>         VectorStoreService.search over n synthetic chunks
+                              (fake embeddings; the query embedding is cached)
+    vector_search_<n>_source  the same, filtered to one 50-chunk source document
+
+Results are compared with benchmarks/baselines.json (or --baseline); the
+run exits with status 1 if any case is slower than its baseline by more
+than --threshold, and with status 2 if there is no baseline to compare
+with. Baselines are machine-specific, so none is committed: record one
+with --save-baseline on the machine that runs the comparison. In CI, do
+both on the same runner:
+
+    git checkout <base commit>
+    python -m benchmarks.microbench --save-baseline --baseline /tmp/baseline.json
+    git checkout <change>
+    python -m benchmarks.microbench --baseline /tmp/baseline.json
+
+Usage (from backend/):
+    python -m benchmarks.microbench [--filter search] [--search-sizes 1000,10000,100000] \
+        [--threshold 0.25] [--baseline PATH] [--save-baseline]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.security import HTTPAuthorizationCredentials
+from langchain_core.documents import Document
+from loguru import logger
+
+from app.core.auth import create_access_token, decode_token, get_current_user
+from app.core.token_manager import TokenManager, token_manager
+from app.services.agent import ComplianceAgent, KB_CONTENT_PATTERN
+from app.services.document_processor import DocumentProcessor
+from app.services.followup_service import followup_service
+from benchmarks.kb_fixture import kb_documents, make_embeddings, synthetic_chunks
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+def _run_sync(coroutine):
+    """Drive a coroutine that never suspends (no event loop overhead in the timing)."""
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("coroutine suspended")
+
+def token_cases() -> Dict[str, Callable]:
+    short = synthetic_chunks(1, seed=1, words=20)[0].page_content
+    long = " ".join(chunk.page_content for chunk in synthetic_chunks(20, seed=2))
+    turns = [chunk.page_content for chunk in synthetic_chunks(40, seed=5, words=60)]
+    history = "Summary of earlier conversation:\n" + short + "\n\n" + "\n".join(
+        f"{'user' if i % 2 == 0 else 'assistant'}: {turn}" for i, turn in enumerate(turns)
+    )
+    docs = synthetic_chunks(5, seed=6, words=150)
+    # Budget that forces trim_history to drop turns
+    tight = TokenManager(max_input_tokens=token_manager.history_tokens(history) // 2 + 1500)
+    return {
+        "count_tokens_short": lambda: token_manager.count_tokens(short),
+        "count_tokens_long": lambda: token_manager.count_tokens(long),
+        "history_tokens": lambda: token_manager.history_tokens(history),
+        "pack_context_fits": lambda: token_manager.pack_context(history, docs, short),
+        "pack_context_trims": lambda: tight.pack_context(history, docs, short),
+    }
+
+def fast_path_cases() -> Dict[str, Callable]:
+    doc = kb_documents()[0]
+    kb_id = doc.metadata["id"]
+    return {
+        "kb_content_regex": lambda: KB_CONTENT_PATTERN.search(doc.page_content).group(1).strip(),
+        "build_kb_answer": lambda: ComplianceAgent._build_kb_answer(doc),
+        "followup_questions": lambda: followup_service.get_followup_questions(kb_id, max_questions=3),
+    }
+
+def ingest_cases() -> Dict[str, Callable]:
+    processor = DocumentProcessor()
+    text = synthetic_chunks(1, seed=3, words=150)[0].page_content
+    metadata = {"source": "synthetic.pdf", "type": "pdf"}
+    # The chunk is modified in place, so every call enriches a fresh one
+    return {
+        "enrich_chunk_context": lambda: processor._enrich_chunk_context(Document(page_content=text, metadata={}), metadata),
+    }
+
+def auth_cases() -> Dict[str, Callable]:
+    token = create_access_token({"sub": "bench@example.com", "user_id": "bench-user"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return {
+        "decode_token": lambda: decode_token(token),
+        "get_current_user": lambda: _run_sync(get_current_user(credentials)),
+    }
+
+def _search_case_name(size: int) -> str:
+    return f"vector_search_{size // 1000}k" if size % 1000 == 0 else f"vector_search_{size}"
+
+def search_cases(sizes: List[int]) -> Dict[str, Callable]:
+    from app.services.vector_store import VectorStoreService, vectorstores
+
+    embeddings = make_embeddings(fake=True)
+    # Nonexistent path: starts empty and is never saved, each size is swapped in below
+    vector_store = VectorStoreService(index_path="/nonexistent/microbench_index", embeddings=embeddings)
+    query = "What approvals are required before procurement expenditure is sanctioned?"
+    cases = {}
+    for size in sizes:
+        chunks = synthetic_chunks(size, seed=4, words=40)
+        texts = [chunk.page_content for chunk in chunks]
+        vector_db = vectorstores.FAISS.from_embeddings(
+            zip(texts, embeddings.embed_documents(texts)), embeddings, metadatas=[c.metadata for c in chunks]
+        )
+
+        def search(vector_db=vector_db, filters=None):
+            vector_store.vector_db = vector_db
+            return vector_store.search(query, k=4, filters=filters)
+
+        cases[_search_case_name(size)] = search
+        cases[f"{_search_case_name(size)}_source"] = lambda search=search: search(filters={"source": ["synthetic_0.pdf"]})
+    return cases
+
+def measure(func: Callable, rounds: int, min_time: float) -> Dict[str, float]:
+    """Median and minimum seconds per call."""
+    func()  # warm caches, lazy imports and the regex/encoder state
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - start >= min_time:
+            break
+        loops *= 2
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for _ in range(loops):
+                func()
+            timings.append((time.perf_counter() - start) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {"median": statistics.median(timings), "min": min(timings), "loops": loops}
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> Tuple[List[str], List[str]]:
+    """Rows for the report and the names of regressed cases."""
+    rows, regressions = [], []
+    for name, result in results.items():
+        median_us = result["median"] * 1e6
+        previous = baseline.get(name)
+        if previous is None:
+            rows.append(f"{name:<34}{median_us:>12.2f}{result['min'] * 1e6:>12.2f}{'-':>12}{'-':>9}  new")
+            continue
+        change = median_us / previous["median_us"] - 1
+        status = "REGRESSION" if change > threshold else "ok"
+        if status == "REGRESSION":
+            regressions.append(name)
+        rows.append(
+            f"{name:<34}{median_us:>12.2f}{result['min'] * 1e6:>12.2f}{previous['median_us']:>12.2f}{change * 100:>+8.1f}%  {status}"
+        )
+    return rows, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", help="Only run cases whose name contains this substring")
+    parser.add_argument("--search-sizes", default="1000,10000,100000", help="Chunk counts for vector_search cases")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="Minimum seconds per round")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown vs. baseline (0.25 = 25%%)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run's results as the new baseline")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    cases = {**token_cases(), **fast_path_cases(), **ingest_cases(), **auth_cases()}
+    # Building the large indexes takes a while; skip it when filtered out
+    sizes = [
+        int(size) for size in args.search_sizes.split(",")
+        if size and (not args.filter or args.filter in _search_case_name(int(size)))
+    ]
+    cases.update(search_cases(sizes))
+    if args.filter:
+        cases = {name: func for name, func in cases.items() if args.filter in name}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("cases", {})
+    elif not args.save_baseline:
+        print(f"No baseline at {args.baseline}; record one with --save-baseline (see the module docstring)", file=sys.stderr)
+        sys.exit(2)
+
+    results = {name: measure(func, args.rounds, args.min_time) for name, func in cases.items()}
+
+    rows, regressions = compare(results, baseline, args.threshold)
+    print(f"{'case':<34}{'median_us':>12}{'min_us':>12}{'baseline':>12}{'change':>9}")
+    print("-" * 81)
+    print("\n".join(rows))
+
+    if args.save_baseline:
+        baseline.update({
+            name: {"median_us": round(result["median"] * 1e6, 3), "min_us": round(result["min"] * 1e6, 3)}
+            for name, result in results.items()
+        })
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "machine": f"{platform.machine()} {platform.processor() or platform.system()}",
+                "python": platform.python_version(),
+                "cases": baseline
+            }, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Before/after throughput of the request logging middleware.
+
+Compares the previous BaseHTTPMiddleware-based `logging_middleware` (kept
+here verbatim as `legacy_logging_middleware`) with the pure-ASGI
+LoggingMiddleware on two routes:
+
+- /api/v1/health/      the real liveness endpoint
+- /api/v1/query/       a fast-path KB hit: a pre-serialized answer spliced
+                       into the response envelope (auth, Mongo and FAISS are
+                       left out so the middleware cost is not drowned out)
+
+Requests go through httpx's ASGI transport, so no server or network is
+involved. Logs are formatted as in production but written to a null sink.
+
+Usage (from backend/):
+    python -m benchmarks.middleware_bench [--requests 5000] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import orjson
+from fastapi import FastAPI, Request
+from loguru import logger
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.api.endpoints import health
+from app.core.log_config import configure_logging, LOG_FORMAT
+from app.core.middleware import LoggingMiddleware
+from app.core.responses import query_envelope
+from app.core.tracing import start_trace
+from app.models.schemas import ComplianceAssessment, ComplianceSource
+
+async def legacy_logging_middleware(request: Request, call_next):
+    start_time = time.time()
+    correlation_id = request.headers.get("X-Correlation-ID", str(uuid.uuid4()))
+    # Stages recorded downstream (metrics.time / observe_stage) land in this trace
+    trace = start_trace(correlation_id)
+
+    # Log Request
+    logger.info(f"[{correlation_id}] Incoming Request: {request.method} {request.url}")
+
+    try:
+        response = await call_next(request)
+        process_time = time.time() - start_time
+
+        # Add Header to response for tracing
+        response.headers["X-Correlation-ID"] = correlation_id
+        # Per-stage timings, shown in the browser devtools network timing tab
+        response.headers["Server-Timing"] = trace.server_timing()
+        response.headers["Timing-Allow-Origin"] = "*"
+
+        # Log Response: one structured line per request with its stage breakdown
+        logger.bind(
+            method=request.method,
+            path=request.url.path,
+            status=response.status_code,
+            duration_ms=round(process_time * 1000, 1),
+            stages={stage: round(seconds * 1000, 1) for stage, seconds in trace.stages.items()}
+        ).info(
+            f"[{correlation_id}] Response: {response.status_code} "
+            f"Process Time: {process_time:.4f}s"
+            + (f" Stages: {trace.summary()}" if trace.stages else "")
+        )
+        return response
+
+    except Exception as e:
+        logger.error(f"[{correlation_id}] Request Failed: {str(e)}")
+        raise e
+
+FAST_PATH_FRAGMENT = orjson.dumps(ComplianceAssessment(
+    response="Know Your Customer (KYC) requires banks to verify the identity of customers before opening accounts.",
+    reasoning="Source: KYC Basics (KB_DEF_001)",
+    sources=[ComplianceSource(document_name="KYC Basics", excerpt="Know Your Customer (KYC) requires...", relevance_score=1.0)],
+    conversation_type="kb_direct",
+    follow_up_questions=["What documents are accepted for KYC?", "How often must KYC be refreshed?"]
+).model_dump())
+
+def build_app(variant: str) -> FastAPI:
+    app = FastAPI()
+    if variant == "legacy":
+        app.add_middleware(BaseHTTPMiddleware, dispatch=legacy_logging_middleware)
+    else:
+        app.add_middleware(LoggingMiddleware)
+
+    app.include_router(health.router, prefix="/api/v1/health")
+
+    @app.post("/api/v1/query/")
+    async def fast_path_query():
+        return query_envelope("bench_session", FAST_PATH_FRAGMENT)
+
+    return app
+
+async def measure(app: FastAPI, method: str, path: str, requests: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        body = {"query": "What is KYC?"} if method == "POST" else None
+        # Warm up routing, pydantic and the loguru sink
+        for _ in range(50):
+            await client.request(method, path, json=body)
+
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.request(method, path, json=body)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200 and "server-timing" in response.headers
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests_per_s": round(requests / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3)
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    configure_logging()
+    logger.remove()
+    logger.add(lambda message: None, format=LOG_FORMAT, level="INFO")
+
+    routes = [("GET", "/api/v1/health/"), ("POST", "/api/v1/query/")]
+    results = {}
+    for method, path in routes:
+        for variant in ("legacy", "asgi"):
+            results.setdefault(path, {})[variant] = await measure(
+                build_app(variant), method, path, args.requests, args.concurrency
+            )
+        legacy, asgi = results[path]["legacy"], results[path]["asgi"]
+        results[path]["throughput_gain"] = f"{(asgi['requests_per_s'] / legacy['requests_per_s'] - 1) * 100:+.1f}%"
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,180 @@
+"""
+Retrieval quality vs. latency benchmark.
+
+Every `question_intents` entry in data/knowledge_base.json is a labeled
+query whose ground truth is its own KB entry `id`. The Golden KB is indexed
+as in ingest_kb.py, together with synthetic PDF chunks as distractors, and
+each index mode is scored on:
+
+- recall@k           ground-truth entry within the top k
+- MRR                mean reciprocal rank of the ground-truth entry
+- fast-path rate     share of queries whose top hit is a KB entry (the
+                     agent answers those without the LLM)
+- fast-path prec.    share of those fast-path answers that are the right entry
+- latency            per-query FAISS search, p50/p95
+- memory             serialized index size
+
+"flat" is what VectorStoreService builds today (FAISS.from_documents, exact
+L2); the other modes are candidate FAISS index types built from the same
+vectors, so a retrieval change gets a number for both speed and quality
+before it ships. Query embedding time is mode-independent and reported once.
+
+Quality numbers are only meaningful with the real FastEmbed model;
+--fake-embeddings is for latency/memory runs without the model download.
+
+Usage (from backend/):
+    python -m benchmarks.retrieval_bench [--filler-chunks 2000] [--k 1,3,5,10] \
+        [--modes flat,hnsw,sq8,ivf] [--fake-embeddings] [--output results.json]
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import faiss
+import numpy as np
+from loguru import logger
+
+from benchmarks.kb_fixture import build_vector_store, labeled_queries, make_embeddings
+
+def _ivf(dim: int, count: int):
+    nlist = max(1, int(math.sqrt(count)))
+    index = faiss.index_factory(dim, f"IVF{nlist},Flat")
+    index.nprobe = max(1, nlist // 8)
+    return index
+
+def _hnsw(dim: int, count: int):
+    index = faiss.index_factory(dim, "HNSW32")
+    index.hnsw.efSearch = 64
+    return index
+
+# name -> (description, factory(dim, vector count))
+MODES: Dict[str, Tuple[str, Callable]] = {
+    "flat": ("exact L2 (production)", lambda dim, count: faiss.index_factory(dim, "Flat")),
+    "hnsw": ("HNSW M=32 efSearch=64", _hnsw),
+    "sq8": ("8-bit scalar quantized", lambda dim, count: faiss.index_factory(dim, "SQ8")),
+    "ivf": ("IVF nlist=sqrt(n) nprobe=nlist/8", _ivf),
+}
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def build_index(mode: str, vectors: np.ndarray):
+    index = MODES[mode][1](vectors.shape[1], len(vectors))
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+def evaluate(index, query_vectors: np.ndarray, truths: List[str], positions: List[Dict], ks: List[int]) -> Dict:
+    """Score one index; `positions[i]` is the metadata of the document at FAISS position i."""
+    depth = max(ks)
+    hits = {k: 0 for k in ks}
+    reciprocal_ranks = []
+    fast_path, fast_path_correct = 0, 0
+    latencies = []
+
+    for vector, truth in zip(query_vectors, truths):
+        start = time.perf_counter()
+        _, ids = index.search(vector.reshape(1, -1), depth)
+        latencies.append(time.perf_counter() - start)
+
+        ranked = [positions[i] for i in ids[0] if i >= 0]
+        ranked_ids = [meta.get("id") for meta in ranked]
+        rank = ranked_ids.index(truth) + 1 if truth in ranked_ids else None
+        for k in ks:
+            hits[k] += bool(rank and rank <= k)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+
+        if ranked and ranked[0].get("type") == "kb_entry":
+            fast_path += 1
+            fast_path_correct += ranked_ids[0] == truth
+
+    total = len(truths)
+    return {
+        **{f"recall@{k}": round(hits[k] / total, 3) for k in ks},
+        "mrr": round(sum(reciprocal_ranks) / total, 3),
+        "fast_path_rate": round(fast_path / total, 3),
+        "fast_path_precision": round(fast_path_correct / fast_path, 3) if fast_path else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "index_mb": round(len(faiss.serialize_index(index)) / 2**20, 2)
+    }
+
+def print_table(results: Dict, ks: List[int]):
+    columns = [f"recall@{k}" for k in ks] + ["mrr", "fast_path_rate", "fast_path_precision", "p50_ms", "p95_ms", "index_mb"]
+    header = f"{'mode':<8}" + "".join(f"{column:>{len(column) + 2}}" for column in columns)
+    print(header)
+    print("-" * len(header))
+    for mode, row in results["modes"].items():
+        print(f"{mode:<8}" + "".join(f"{'-' if row[c] is None else row[c]:>{len(c) + 2}}" for c in columns))
+    print(
+        f"\n{results['queries']} queries over {results['vectors']} vectors (dim {results['dim']}); "
+        f"query embedding p50 {results['embed_p50_ms']} ms"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filler-chunks", type=int, default=2000, help="Synthetic non-KB distractor chunks")
+    parser.add_argument("--k", default="1,3,5,10", help="Comma-separated cut-offs for recall@k")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated subset of: {', '.join(MODES)}")
+    parser.add_argument("--fake-embeddings", action="store_true", help="Skip the FastEmbed model download")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    ks = sorted(int(k) for k in args.k.split(","))
+    modes = args.modes.split(",")
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    embeddings = make_embeddings(fake=args.fake_embeddings)
+    with tempfile.TemporaryDirectory() as index_dir:
+        vector_store = build_vector_store(os.path.join(index_dir, "faiss_index"), embeddings, filler_chunks=args.filler_chunks)
+
+    # Vectors and the position -> document mapping come from the production index
+    vector_db = vector_store.vector_db
+    vectors = vector_db.index.reconstruct_n(0, vector_db.index.ntotal)
+    positions = [
+        vector_db.docstore.search(vector_db.index_to_docstore_id[i]).metadata
+        for i in range(vector_db.index.ntotal)
+    ]
+
+    queries = labeled_queries()
+    embed_latencies, query_vectors = [], []
+    for query, _ in queries:
+        start = time.perf_counter()
+        query_vectors.append(embeddings.embed_query(query))
+        embed_latencies.append(time.perf_counter() - start)
+    query_vectors = np.asarray(query_vectors, dtype="float32")
+    truths = [truth for _, truth in queries]
+
+    results = {
+        "queries": len(queries),
+        "vectors": len(vectors),
+        "dim": vectors.shape[1],
+        "fake_embeddings": args.fake_embeddings,
+        "embed_p50_ms": round(percentile(embed_latencies, 50) * 1000, 3),
+        "modes": {}
+    }
+    for mode in modes:
+        index = vector_db.index if mode == "flat" else build_index(mode, vectors)
+        results["modes"][mode] = {"description": MODES[mode][0], **evaluate(index, query_vectors, truths, positions, ks)}
+
+    print_table(results, ks)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
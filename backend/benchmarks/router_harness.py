@@ -0,0 +1,111 @@
+"""
+Local harness for ProviderRouter using fake providers.
+
+Runs a few scenarios (healthy, degraded primary, primary outage, flapping)
+and prints which provider served each request, latency percentiles and the
+final breaker state. No network or API keys required.
+
+Usage (from backend/):
+    python -m benchmarks.router_harness [--requests 200] [--concurrency 10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.llm_router import ProviderRouter, LLMProvider, AllProvidersFailed
+from benchmarks.fake_llm import FakeProvider
+
+SCENARIOS = {
+    "healthy": dict(
+        primary=dict(latency_ms=300, jitter_ms=100),
+        secondary=dict(latency_ms=600, jitter_ms=100)
+    ),
+    "degraded_primary": dict(
+        # Most calls are fine, one in five is very slow: hedging should cap the tail
+        primary=dict(latency_ms=300, jitter_ms=100),
+        secondary=dict(latency_ms=600, jitter_ms=100),
+        slow_every=5,
+        slow_ms=4000
+    ),
+    "primary_outage": dict(
+        primary=dict(latency_ms=300, failure_rate=1.0),
+        secondary=dict(latency_ms=600, jitter_ms=100)
+    ),
+    "flapping": dict(
+        primary=dict(latency_ms=300, jitter_ms=100, failure_rate=0.3),
+        secondary=dict(latency_ms=600, jitter_ms=100)
+    ),
+}
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
+async def run_scenario(name: str, config: dict, requests: int, concurrency: int) -> dict:
+    primary = FakeProvider(seed=1, **config["primary"])
+    secondary = FakeProvider(seed=2, **config["secondary"])
+
+    if "slow_every" in config:
+        fast_call = primary
+
+        async def primary_call(prompt, _n=[0]):
+            _n[0] += 1
+            if _n[0] % config["slow_every"] == 0:
+                await asyncio.sleep(config["slow_ms"] / 1000)
+            return await fast_call(prompt)
+    else:
+        primary_call = primary
+
+    router = ProviderRouter(
+        [LLMProvider("primary", primary_call), LLMProvider("secondary", secondary)],
+        hedge_enabled=True,
+        hedge_percentile=95,
+        hedge_min_samples=10
+    )
+
+    served = Counter()
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                provider_name, _ = await router.run(f"question {i}")
+                served[provider_name] += 1
+            except AllProvidersFailed:
+                served["failed"] += 1
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+
+    return {
+        "scenario": name,
+        "served": dict(served),
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "p99_s": round(percentile(latencies, 99), 3),
+        "secondary_calls": secondary.calls,
+        "secondary_cancelled": secondary.cancelled,
+        "providers": router.status()
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenario", choices=list(SCENARIOS), action="append")
+    args = parser.parse_args()
+
+    for name in args.scenario or SCENARIOS:
+        result = await run_scenario(name, SCENARIOS[name], args.requests, args.concurrency)
+        print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -7,6 +7,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from langchain_core.documents import Document
 from app.services.vector_store import VectorStoreService
+from app.core.token_manager import token_manager
 
 KB_FILE_PATH = "data/knowledge_base.json"
 
@@ -78,7 +79,8 @@ def run_ingestion():
             "category": entry.get("category"),
             "title": entry.get("title"),
             "source": kb_data.get("source_document", {}).get("title"),
-            "type": "kb_entry"
+            "type": "kb_entry",
+            "token_count": token_manager.count_tokens(text_content)
         }
         
         doc = Document(page_content=text_content, metadata=metadata)
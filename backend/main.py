@@ -1,17 +1,36 @@
-from contextlib import asynccontextmanager
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from app.api.routes import router as api_router
-from app.core.config import settings
-from app.core.database import db
-from app.core.middleware import logging_middleware
+from app.core.startup_profiler import startup_profiler
+from app.core.log_config import configure_logging
+
+configure_logging()
+
+# Per-module import times are logged and exported once warmup completes
+with startup_profiler.profile_imports():
+    import asyncio
+    from contextlib import asynccontextmanager
+    from fastapi import FastAPI, Response
+    from fastapi.middleware.cors import CORSMiddleware
+    from app.api.routes import router as api_router
+    from app.core.config import settings
+    from app.core.database import db
+    from app.core.metrics import metrics
+    from app.core.middleware import LoggingMiddleware
+    from app.services.chat_history import retention_pruner, chat_write_buffer
+    from app.services.followup_prefetcher import followup_prefetcher
+    from app.services.warmup import warm_up
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await db.connect()
+    # Bind the port immediately; Mongo and the models come up in the background
+    # and /health/status reports readiness until they do
+    warmup_task = asyncio.create_task(warm_up())
     yield
+    warmup_task.cancel()
+    await asyncio.gather(warmup_task, return_exceptions=True)
+    await followup_prefetcher.stop()
+    await retention_pruner.stop()
+    await chat_write_buffer.stop()
     db.close()
+    metrics.shutdown()
 
 app = FastAPI(
     title=settings.PROJECT_NAME, 
@@ -19,7 +38,7 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-app.add_middleware(BaseHTTPMiddleware, dispatch=logging_middleware)
+app.add_middleware(LoggingMiddleware)
 
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -28,6 +47,8 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Let the frontend read request tracing headers
+        expose_headers=["X-Correlation-ID", "Server-Timing"],
     )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -35,3 +56,9 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 @app.get("/")
 def root():
     return {"message": "Welcome to the Regulatory Compliance Assistant API", "docs": "/docs"}
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint (per-stage latency histograms, path/cache/token counters)."""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
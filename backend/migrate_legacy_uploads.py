@@ -0,0 +1,99 @@
+"""
+One-off migration: move uploads out of the shared KB index.
+
+Before per-user namespaces, /ingest added uploaded PDFs to data/faiss_index
+next to the Golden KB, so every user's searches can still return them. Those
+chunks never recorded who uploaded them, so:
+
+- chunks of a source given with --owner SOURCE=USER_ID move to that user's namespace
+- all other non-KB chunks move to the "legacy_uploads" namespace, which no search reads
+- the shared index is rewritten with only the Golden KB entries
+
+Vectors are copied, not re-embedded. Run it once with the API stopped (it
+rewrites index files); --dry-run only reports what would move. If it fails
+part-way, restore VECTOR_TENANT_INDEX_DIR from a backup before rerunning, or
+the chunks already moved are added twice.
+
+Usage (from backend/):
+    python migrate_legacy_uploads.py [--owner report.pdf=<user_id> ...] [--dry-run]
+"""
+import argparse
+import os
+import shutil
+import sys
+from typing import Dict, List, Tuple
+
+# Ensure backend directory is in python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.documents import Document
+from app.services.vector_store import KB_NAMESPACE, LEGACY_NAMESPACE, VectorStoreService, user_namespace
+
+def split_shared_index(vector_db, owners: Dict[str, str]) -> Dict[str, Tuple[List[Document], List]]:
+    """Chunks of the shared index, with their vectors, grouped by the namespace they belong in."""
+    vectors = vector_db.index.reconstruct_n(0, vector_db.index.ntotal)
+    groups: Dict[str, Tuple[List[Document], List]] = {}
+    for position, vector in enumerate(vectors):
+        doc = vector_db.docstore.search(vector_db.index_to_docstore_id[position])
+        if doc.metadata.get("type") == "kb_entry":
+            namespace = KB_NAMESPACE
+        elif doc.metadata.get("source") in owners:
+            namespace = user_namespace(owners[doc.metadata["source"]])
+        else:
+            namespace = LEGACY_NAMESPACE
+        docs, group_vectors = groups.setdefault(namespace, ([], []))
+        docs.append(doc)
+        group_vectors.append(vector)
+    return groups
+
+def migrate(vector_store: VectorStoreService, owners: Dict[str, str], dry_run: bool = False) -> Dict[str, int]:
+    """
+    Move non-KB chunks out of the shared index.
+
+    Returns:
+        Chunk count per destination namespace (KB_NAMESPACE: chunks kept shared)
+    """
+    if vector_store.vector_db is None:
+        return {}
+
+    groups = split_shared_index(vector_store.vector_db, owners)
+    counts = {namespace: len(docs) for namespace, (docs, _) in groups.items()}
+    if dry_run or set(groups) <= {KB_NAMESPACE}:
+        return counts
+
+    for namespace, (docs, vectors) in groups.items():
+        if namespace != KB_NAMESPACE:
+            vector_store.add_documents(docs, namespace=namespace, vectors=vectors)
+
+    kb_docs, kb_vectors = groups.get(KB_NAMESPACE, ([], []))
+    vector_store.vector_db = None
+    vector_store._metadata.pop(KB_NAMESPACE, None)
+    if kb_docs:
+        vector_store.add_documents(kb_docs, vectors=kb_vectors)
+    else:
+        shutil.rmtree(vector_store.index_path, ignore_errors=True)
+    return counts
+
+def parse_owner(value: str) -> Tuple[str, str]:
+    source, sep, user_id = value.rpartition("=")
+    if not sep or not source or not user_id:
+        raise argparse.ArgumentTypeError(f"expected SOURCE=USER_ID, got {value!r}")
+    return source, user_id
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--owner", type=parse_owner, action="append", default=[],
+                        help="SOURCE=USER_ID: move the chunks of this uploaded file to the user's namespace")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would move")
+    args = parser.parse_args()
+
+    counts = migrate(VectorStoreService(), dict(args.owner), dry_run=args.dry_run)
+    if not counts:
+        print("No shared index found; nothing to migrate.")
+        return
+    for namespace, count in sorted(counts.items()):
+        action = "kept in the shared KB" if namespace == KB_NAMESPACE else f"{'would move' if args.dry_run else 'moved'} to {namespace}"
+        print(f"{count} chunks {action}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+@pytest.fixture(scope="session")
+def vector_store(tmp_path_factory):
+    """The VectorStoreService singleton over the Golden KB plus synthetic chunks, with fake embeddings."""
+    from benchmarks.kb_fixture import build_vector_store, make_embeddings
+    index_path = str(tmp_path_factory.mktemp("index") / "faiss_index")
+    return build_vector_store(index_path, make_embeddings(fake=True), filler_chunks=200)
+
+@pytest.fixture
+def mongo():
+    """In-memory MongoDB (mongomock-motor) in place of the real connection."""
+    from mongomock_motor import AsyncMongoMockClient
+    from app.core.database import db
+    previous = db.client, db.db
+    db.client = AsyncMongoMockClient()
+    db.db = db.client["compliance_rag_db"]
+    yield db.db
+    db.client, db.db = previous
+
+@pytest.fixture
+def agent(vector_store):
+    """ComplianceAgent singleton backed by the fake chat model, with fast-path answers precomputed."""
+    from app.services import agent as agent_module
+    from benchmarks.fake_llm import fake_chat_model
+    previous = agent_module._compliance_agent
+    agent_module._compliance_agent = agent_module.ComplianceAgent(llm=fake_chat_model(latency_ms=10, jitter_ms=0))
+    agent_module._compliance_agent.precompute_fast_path(vector_store)
+    yield agent_module._compliance_agent
+    agent_module._compliance_agent = previous
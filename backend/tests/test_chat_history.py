@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from app.services import chat_history
+from app.services.chat_history import ChatHistoryService, ChatWriteBuffer
+
+def test_get_history_returns_latest_messages_with_buffered_turn(mongo, monkeypatch):
+    # Never flushes on its own, so the last turn stays buffered while reading
+    buffer = ChatWriteBuffer(flush_size=1000, flush_interval_ms=60_000)
+    monkeypatch.setattr(chat_history, "chat_write_buffer", buffer)
+
+    async def scenario():
+        start = datetime.utcnow() - timedelta(hours=1)
+        await mongo["chat_history"].insert_many([
+            {
+                "_id": ObjectId(),
+                "session_id": "session-1",
+                "user_id": "user-1",
+                "role": role,
+                "content": f"{role} {i}",
+                "timestamp": start + timedelta(seconds=2 * i + offset)
+            }
+            for i in range(15)
+            for offset, role in enumerate(["user", "assistant"])
+        ])
+
+        service = ChatHistoryService()
+        buffer.start()
+        try:
+            await service.add_messages("session-1", [("user", "user 15"), ("assistant", "assistant 15")], user_id="user-1")
+            assert len(buffer.buffered(session_id="session-1")) == 2
+            return await service.get_history("session-1", limit=20)
+        finally:
+            await buffer.stop()
+
+    history = asyncio.run(scenario())
+
+    assert len(history) == 20
+    assert history[0] == {"role": "user", "content": "user 6"}
+    assert history[-2:] == [
+        {"role": "user", "content": "user 15"},
+        {"role": "assistant", "content": "assistant 15"}
+    ]
+
+class FailingCollection:
+    """chat_history stand-in: rejects `rejected_ids`, or every write while `down`."""
+
+    def __init__(self, down: bool = False, rejected_ids=()):
+        self.down = down
+        self.rejected_ids = set(rejected_ids)
+        self.calls = 0
+        self.inserted = []
+
+    async def insert_many(self, docs, ordered=True):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("mongo unavailable")
+        rejected = [doc for doc in docs if doc["_id"] in self.rejected_ids]
+        self.inserted += [doc for doc in docs if doc["_id"] not in self.rejected_ids]
+        if rejected:
+            raise BulkWriteError({"writeErrors": [{"code": 121, "op": doc} for doc in rejected]})
+
+def message(content: str) -> dict:
+    return {
+        "_id": ObjectId(), "session_id": "session-1", "user_id": "user-1",
+        "role": "user", "content": content, "timestamp": datetime.utcnow()
+    }
+
+def use_collection(monkeypatch, collection):
+    monkeypatch.setattr(chat_history, "db", SimpleNamespace(db={"chat_history": collection}))
+
+def test_rejected_message_is_dead_lettered_after_max_attempts(monkeypatch):
+    bad, good = message("bad"), message("good")
+    collection = FailingCollection(rejected_ids=[bad["_id"]])
+    use_collection(monkeypatch, collection)
+    buffer = ChatWriteBuffer(flush_size=1000, flush_interval_ms=60_000, max_attempts=3)
+
+    async def scenario():
+        buffer.start()
+        try:
+            await buffer.add([bad, good])
+            results = [await buffer.flush() for _ in range(4)]
+        finally:
+            buffer._task.cancel()
+            buffer._task = None
+        return results
+
+    assert asyncio.run(scenario()) == [False, False, False, True]
+    assert collection.inserted == [good]
+    assert buffer.buffered() == []
+    assert buffer._attempts == {}
+
+def test_flusher_backs_off_while_mongo_is_down(monkeypatch):
+    collection = FailingCollection(down=True)
+    use_collection(monkeypatch, collection)
+    buffer = ChatWriteBuffer(flush_size=1, flush_interval_ms=60_000, retry_backoff_ms=50, max_attempts=100)
+
+    async def scenario():
+        buffer.start()
+        try:
+            # Always at flush_size, so without backoff the flusher would spin
+            await buffer.add([message("hello")])
+            await asyncio.sleep(0.4)
+            collection.down = False
+            await asyncio.sleep(0.5)
+        finally:
+            await buffer.stop()
+
+    asyncio.run(scenario())
+
+    # 50 + 100 + 200 ms delays fit in the outage, then one successful write
+    assert 3 <= collection.calls <= 6
+    assert [doc["content"] for doc in collection.inserted] == ["hello"]
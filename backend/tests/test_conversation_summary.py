@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.core.token_manager import token_manager
+from app.services.conversation_summary import ConversationSummaryService
+
+def seed_history(mongo, count: int, words: int = 50):
+    start = datetime.utcnow() - timedelta(hours=1)
+    asyncio.run(mongo["chat_history"].insert_many([
+        {
+            "_id": ObjectId(),
+            "session_id": "session-1",
+            "user_id": "user-1",
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"message {i} " + " ".join(["clause"] * words),
+            "timestamp": start + timedelta(seconds=i)
+        }
+        for i in range(count)
+    ]))
+
+def test_history_context_is_bounded_by_the_token_budget(mongo):
+    seed_history(mongo, 40)
+    service = ConversationSummaryService(token_budget=500, recent_messages=4)
+
+    context = asyncio.run(service.build_history_context("session-1"))
+
+    assert token_manager.history_tokens(context) <= 500
+    assert context.endswith("message 39 " + " ".join(["clause"] * 50))
+    assert "message 30 " not in context
+
+def test_recent_turns_are_kept_even_over_budget(mongo):
+    seed_history(mongo, 10, words=200)
+    service = ConversationSummaryService(token_budget=100, recent_messages=4)
+
+    context = asyncio.run(service.build_history_context("session-1"))
+
+    assert context.startswith("user: message 6 ")
+
+def test_refresh_check_does_not_re_encode_history(mongo, monkeypatch):
+    seed_history(mongo, 20, words=10)
+    service = ConversationSummaryService(token_budget=10_000, recent_messages=4)
+    encoded = []
+    encode = token_manager.encoder.encode
+    monkeypatch.setattr(token_manager, "encoder", type("Counting", (), {
+        "encode": staticmethod(lambda text: encoded.append(text) or encode(text))
+    })())
+    token_manager.count_cached.cache_clear()
+
+    async def turns():
+        await service.build_history_context("session-1")
+        await service._refresh("session-1", "user-1")
+
+    asyncio.run(turns())
+    first = len(encoded)
+    asyncio.run(turns())
+
+    assert first == 20
+    assert len(encoded) == first
@@ -0,0 +1,20 @@
+import asyncio
+
+from app.services.extractive import build_extractive_answer
+
+def test_extractive_answer_reuses_the_retrieval_query_vector(vector_store, monkeypatch):
+    query = "What approvals are required before procurement expenditure is sanctioned?"
+    docs = vector_store.search(query, k=5)
+    embedded_queries = []
+    embeddings_class = type(vector_store.embeddings)
+    embed_query = embeddings_class.embed_query
+    monkeypatch.setattr(
+        embeddings_class, "embed_query",
+        lambda self, text: embedded_queries.append(text) or embed_query(self, text)
+    )
+
+    result = asyncio.run(build_extractive_answer(query, docs, vector_store))
+
+    assert embedded_queries == []
+    assert result.conversation_type == "extractive"
+    assert result.sources
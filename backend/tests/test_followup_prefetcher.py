@@ -0,0 +1,82 @@
+import asyncio
+
+from starlette.background import BackgroundTasks
+
+from app.core.llm_limiter import llm_limiter
+from app.services.agent import AgentDeps
+from app.services.followup_prefetcher import followup_prefetcher
+from benchmarks.kb_fixture import kb_documents
+
+def test_prefetch_scheduled_as_background_task_is_served(vector_store, mongo, agent):
+    # A KB entry's own text retrieves that entry first, so it is answered on the fast path
+    question = kb_documents()[0].page_content
+    deps = AgentDeps(vector_store=vector_store)
+
+    async def scenario():
+        # The same way /query hands it to FastAPI once the response is sent
+        background = BackgroundTasks()
+        background.add_task(followup_prefetcher.schedule, "user-1", "session-1", [question], deps, "strict_formal")
+        await background()
+        await asyncio.gather(*followup_prefetcher._tasks)
+        return followup_prefetcher.get("user-1", "session-1", question)
+
+    prefetched = asyncio.run(scenario())
+    assert prefetched is not None
+    assert prefetched.conversation_type == "kb_direct"
+
+def test_prefetched_answer_is_not_served_to_another_user(vector_store, mongo, agent):
+    question = kb_documents()[1].page_content
+    deps = AgentDeps(vector_store=vector_store)
+
+    async def scenario():
+        await followup_prefetcher.schedule("user-1", "session-2", [question], deps, "strict_formal")
+        await asyncio.gather(*followup_prefetcher._tasks)
+
+    asyncio.run(scenario())
+    assert followup_prefetcher.get("user-1", "session-2", question) is not None
+    # Same session ID and question, different caller
+    assert followup_prefetcher.get("user-2", "session-2", question) is None
+
+def test_nothing_is_prefetched_while_the_llm_limiter_is_busy(vector_store, mongo, agent, monkeypatch):
+    questions = [doc.page_content for doc in kb_documents()[2:4]]
+    deps = AgentDeps(vector_store=vector_store)
+    runs = []
+    run = agent.run
+
+    async def counting_run(query, **kwargs):
+        runs.append(query)
+        return await run(query, **kwargs)
+
+    monkeypatch.setattr(agent, "run", counting_run)
+    # Callers queueing for an LLM slot
+    monkeypatch.setattr(llm_limiter, "waiting", 1)
+
+    async def scenario():
+        await followup_prefetcher.schedule("user-1", "session-3", questions, deps, "strict_formal")
+        await asyncio.gather(*followup_prefetcher._tasks)
+
+    asyncio.run(scenario())
+    assert runs == []
+    assert all(followup_prefetcher.get("user-1", "session-3", q) is None for q in questions)
+
+def test_prefetch_stops_when_load_arrives_midway(vector_store, mongo, agent, monkeypatch):
+    questions = [doc.page_content for doc in kb_documents()[4:7]]
+    deps = AgentDeps(vector_store=vector_store)
+    runs = []
+    run = agent.run
+
+    async def run_then_get_busy(query, **kwargs):
+        runs.append(query)
+        result = await run(query, **kwargs)
+        monkeypatch.setattr(llm_limiter, "waiting", 1)
+        return result
+
+    monkeypatch.setattr(agent, "run", run_then_get_busy)
+
+    async def scenario():
+        await followup_prefetcher.schedule("user-1", "session-4", questions, deps, "strict_formal")
+        await asyncio.gather(*followup_prefetcher._tasks)
+
+    asyncio.run(scenario())
+    assert runs == questions[:1]
+    assert followup_prefetcher.get("user-1", "session-4", questions[0]) is not None
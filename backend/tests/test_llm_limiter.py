@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.llm_limiter import LimiterTimeout, LLMLimiter
+
+def test_deadline_waiting_for_a_slot_raises_limiter_timeout():
+    limiter = LLMLimiter(max_concurrency=1, requests_per_minute=600, tokens_per_minute=100_000, deadline_seconds=5)
+
+    async def scenario():
+        async with limiter.acquire(tokens=10):
+            start = time.monotonic()
+            with pytest.raises(LimiterTimeout):
+                async with limiter.acquire(tokens=10, deadline=0.05):
+                    pass
+            assert time.monotonic() - start < 1
+            assert limiter.waiting == 0
+
+        # The slot freed by the holder is usable again
+        async with limiter.acquire(tokens=10, deadline=0.05):
+            assert limiter.in_flight == 1
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+def test_rate_limit_past_the_deadline_fails_fast_and_releases_the_slot():
+    limiter = LLMLimiter(max_concurrency=2, requests_per_minute=1, tokens_per_minute=100_000, deadline_seconds=5)
+
+    async def scenario():
+        async with limiter.acquire(tokens=10):
+            pass
+
+        start = time.monotonic()
+        # The next request slot is ~60s away: no point waiting for a 1s deadline
+        with pytest.raises(LimiterTimeout):
+            async with limiter.acquire(tokens=10, deadline=1.0):
+                pass
+        assert time.monotonic() - start < 0.5
+        assert limiter._semaphore._value == 2
+        assert limiter.waiting == 0 and limiter.in_flight == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,47 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.core.llm_limiter import LimiterTimeout
+from app.services.llm_router import CircuitBreaker, LLMProvider, ProviderRouter
+
+def test_gate_timeout_is_not_a_provider_failure():
+    calls = []
+
+    async def primary(prompt):
+        calls.append(prompt)
+        return "primary"
+
+    async def secondary(prompt):
+        return "secondary"
+
+    @asynccontextmanager
+    async def full_queue(prompt):
+        await asyncio.sleep(0.05)
+        raise LimiterTimeout("Timed out waiting for an LLM slot")
+        yield
+
+    provider = LLMProvider("primary", primary, gate=full_queue)
+    router = ProviderRouter([provider, LLMProvider("secondary", secondary)], hedge_enabled=False)
+
+    for _ in range(provider.breaker.failure_threshold + 1):
+        assert asyncio.run(router.run("question")) == ("secondary", "secondary")
+
+    assert calls == []
+    assert provider.breaker.state == CircuitBreaker.CLOSED
+    assert len(provider.stats.outcomes) == 0
+
+def test_gate_wait_is_excluded_from_latency():
+    async def primary(prompt):
+        return "primary"
+
+    @asynccontextmanager
+    async def slow_queue(prompt):
+        await asyncio.sleep(0.1)
+        yield
+
+    provider = LLMProvider("primary", primary, gate=slow_queue)
+    router = ProviderRouter([provider], hedge_enabled=False)
+
+    assert asyncio.run(router.run("question")) == ("primary", "primary")
+    assert list(provider.stats.outcomes) == [True]
+    assert provider.stats.percentile(95) < 0.05
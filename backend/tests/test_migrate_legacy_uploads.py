@@ -0,0 +1,35 @@
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.services.vector_store import KB_NAMESPACE, LEGACY_NAMESPACE, user_namespace, vectorstores
+from migrate_legacy_uploads import migrate
+
+def test_legacy_uploads_leave_the_shared_index(vector_store, tmp_path, monkeypatch):
+    docs = [
+        Document(page_content="KYC requirements for opening an account", metadata={"type": "kb_entry", "id": "kb-1"}),
+        Document(page_content="Procurement approvals above the threshold", metadata={"type": "kb_entry", "id": "kb-2"}),
+        Document(page_content="Owned upload about procurement approvals", metadata={"type": "pdf", "source": "a.pdf"}),
+        Document(page_content="Orphan upload about procurement approvals", metadata={"type": "pdf", "source": "b.pdf"}),
+    ]
+    shared = vectorstores.FAISS.from_documents(docs, vector_store.embeddings)
+    monkeypatch.setattr(vector_store, "vector_db", shared)
+    monkeypatch.setattr(vector_store, "index_path", str(tmp_path / "faiss_index"))
+    monkeypatch.setattr(settings, "VECTOR_TENANT_INDEX_DIR", str(tmp_path / "tenants"))
+    owner, other = user_namespace("u1"), user_namespace("u2")
+    try:
+        assert migrate(vector_store, {"a.pdf": "u1"}, dry_run=True) == {KB_NAMESPACE: 2, owner: 1, LEGACY_NAMESPACE: 1}
+        assert vector_store.vector_db is shared
+
+        migrate(vector_store, {"a.pdf": "u1"})
+
+        assert vector_store.vector_db.index.ntotal == 2
+        other_results = vector_store.search("procurement approvals", k=4, namespaces=[other])
+        assert {doc.metadata["type"] for doc in other_results} == {"kb_entry"}
+        owner_results = vector_store.search("procurement approvals", k=4, namespaces=[owner])
+        assert {doc.metadata.get("source") for doc in owner_results} == {None, "a.pdf"}
+        assert vector_store._get_namespace(LEGACY_NAMESPACE).index.ntotal == 1
+    finally:
+        for namespace in (owner, LEGACY_NAMESPACE):
+            vector_store._namespaces.pop(namespace, None)
+            vector_store._metadata.pop(namespace, None)
+        vector_store._metadata.pop(KB_NAMESPACE, None)
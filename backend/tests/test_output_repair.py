@@ -0,0 +1,26 @@
+import pytest
+
+from app.services.output_repair import OutputRepairError, lenient_json_loads
+
+def test_python_literal_fix_up_leaves_string_values_alone():
+    text = "{'response': 'Set flag to true, not null', 'approved': true, 'note': None, 'tags': ['a, ]',],}"
+
+    assert lenient_json_loads(text) == {
+        "response": "Set flag to true, not null",
+        "approved": True,
+        "note": None,
+        "tags": ["a, ]"]
+    }
+
+def test_comments_and_trailing_commas_inside_strings_are_kept():
+    text = '{\n  // model note\n  "response": "see https://example.com/a, }",\n  "status": \'x\',\n}'
+
+    assert lenient_json_loads(text) == {"response": "see https://example.com/a, }", "status": "x"}
+
+@pytest.mark.parametrize("text", [
+    "{[1]: 'unhashable key'}",
+    "{'response': " + "-" * 100_000 + "1}",
+])
+def test_literal_eval_failures_become_repair_errors(text):
+    with pytest.raises(OutputRepairError):
+        lenient_json_loads(text)
@@ -0,0 +1,19 @@
+import asyncio
+
+from app.services import pydantic_agent
+
+def test_router_setup_failure_returns_the_error_assessment(monkeypatch):
+    def broken_router():
+        raise RuntimeError("GROQ_API_KEY is not set")
+
+    class NoDocuments:
+        def search(self, query, k=5):
+            return []
+
+    monkeypatch.setattr(pydantic_agent, "VectorStoreService", NoDocuments)
+    monkeypatch.setattr(pydantic_agent, "get_router", broken_router)
+
+    result = asyncio.run(pydantic_agent.run_pydantic_agent("Is a board resolution required?"))
+
+    assert result.conversation_type == "error"
+    assert "GROQ_API_KEY" in result.reasoning
@@ -0,0 +1,44 @@
+import asyncio
+
+from app.api.endpoints import query as query_module
+from app.models.schemas import BatchQueryRequest
+from app.services.chat_history import ChatHistoryService
+from benchmarks.kb_fixture import kb_documents
+
+def test_batch_persists_answered_questions_when_client_disconnects(mongo, agent, vector_store, monkeypatch):
+    kb_question = kb_documents()[0].page_content
+    stuck_question = "Which clauses changed in the latest procurement circular?"
+    answer = agent.run
+
+    async def run(query, **kwargs):
+        if query == stuck_question:
+            await asyncio.Event().wait()  # an LLM call that never finishes
+        return await answer(query, **kwargs)
+
+    monkeypatch.setattr(agent, "run", run)
+    user = {"user_id": "user-1", "email": "user-1@example.com"}
+
+    async def scenario():
+        response = await query_module.query_compliance_batch(
+            BatchQueryRequest(queries=[stuck_question, kb_question], session_id="user-1_batch"),
+            current_user=user,
+            vector_store=vector_store,
+            chat_service=ChatHistoryService()
+        )
+        first_line = asyncio.Event()
+
+        async def client():
+            async for _ in response.body_iterator:
+                first_line.set()
+
+        consumer = asyncio.create_task(client())
+        await asyncio.wait_for(first_line.wait(), timeout=5)
+        consumer.cancel()  # disconnect while the second question is still running
+        await asyncio.gather(consumer, return_exceptions=True)
+        await asyncio.gather(*query_module._persist_tasks)
+        return await ChatHistoryService().get_history("user-1_batch")
+
+    history = asyncio.run(scenario())
+
+    assert [msg["role"] for msg in history] == ["user", "assistant"]
+    assert history[0]["content"] == kb_question
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+class Work:
+    """A call that runs until released, recording starts and cancellation."""
+
+    def __init__(self):
+        self.started = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return "answer"
+
+def test_cancelled_waiter_leaves_shared_call_running():
+    async def scenario():
+        group, work = SingleFlight("test"), Work()
+        first = asyncio.create_task(group.do("key", work))
+        second = asyncio.create_task(group.do("key", work))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        assert first.cancelled()
+        assert not work.cancelled
+
+        work.release.set()
+        assert await second == "answer"
+        assert work.started == 1
+        assert group.in_flight() == 0
+
+    asyncio.run(scenario())
+
+def test_shared_call_is_cancelled_with_its_last_waiter():
+    async def scenario():
+        group, work = SingleFlight("test"), Work()
+        waiters = [asyncio.create_task(group.do("key", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        for waiter in waiters[:2]:
+            waiter.cancel()
+        await asyncio.sleep(0)
+        assert not work.cancelled
+
+        waiters[2].cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert work.cancelled
+        assert group.in_flight() == 0
+
+    asyncio.run(scenario())
+
+def test_errors_reach_every_waiter_and_the_key_is_retried():
+    async def scenario():
+        group, calls = SingleFlight("test"), []
+
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0)
+            raise ValueError("provider error")
+
+        results = await asyncio.gather(group.do("key", failing), group.do("key", failing), return_exceptions=True)
+        assert [type(r) for r in results] == [ValueError, ValueError]
+        assert len(calls) == 1
+
+        with pytest.raises(ValueError):
+            await group.do("key", failing)
+        assert len(calls) == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,47 @@
+from app.core.token_manager import TokenManager
+
+SUMMARY = "Summary of earlier conversation:\nThe user asked about procurement approvals."
+
+def history_of(turns: int) -> str:
+    recent = "\n".join(f"user: question {i} about clause {i}\nassistant: answer {i}\nwith a second line" for i in range(turns))
+    return f"{SUMMARY}\n\n{recent}"
+
+class CountingEncoder:
+    """Wraps the real encoder and counts encode calls."""
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        return self.encoder.encode(text)
+
+    def decode(self, tokens):
+        return self.encoder.decode(tokens)
+
+def test_trim_history_keeps_summary_and_newest_turns_within_budget():
+    manager = TokenManager()
+    history = history_of(30)
+    budget = manager.history_tokens(history) // 2
+
+    trimmed = manager.trim_history(history, budget)
+
+    assert trimmed.startswith(SUMMARY)
+    assert trimmed.endswith("assistant: answer 29\nwith a second line")
+    assert "question 0 " not in trimmed
+    assert manager.count_tokens(trimmed) <= budget
+    assert manager.trim_history(history, manager.history_tokens(history)) == history
+
+def test_history_is_encoded_once_across_requests():
+    manager = TokenManager()
+    manager.encoder = CountingEncoder(manager.encoder)
+    history = history_of(30)
+
+    manager.pack_context(history, [], "question")
+    first = manager.encoder.calls
+    # Next request: the same history plus one new turn
+    manager.pack_context(history + "\nuser: question 30\nassistant: answer 30", [], "question")
+
+    assert first == 1 + 1 + 60  # query, summary, turns
+    assert manager.encoder.calls - first == 2
@@ -0,0 +1,44 @@
+import pytest
+from langchain_core.documents import Document
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.models.schemas import SearchFilters
+from app.services.vector_store import user_namespace
+
+QUERY = "What is a compliance audit?"
+
+def test_search_filters_reject_empty_value_lists():
+    with pytest.raises(ValidationError):
+        SearchFilters(type=[])
+
+def test_empty_filter_values_do_not_filter(vector_store):
+    unfiltered = vector_store.search(QUERY, k=5)
+    assert vector_store.search(QUERY, k=5, filters={"type": []}) == unfiltered
+    assert vector_store.search_batch([QUERY], k=5, filters={"type": []}) == [unfiltered]
+
+def test_empty_field_is_ignored_next_to_other_filters(vector_store):
+    docs = vector_store.search(QUERY, k=5, filters={"type": ["kb_entry"], "source": []})
+    assert docs and all(doc.metadata["type"] == "kb_entry" for doc in docs)
+
+def test_tenant_documents_are_only_searched_by_their_owner(vector_store, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_TENANT_INDEX_DIR", str(tmp_path))
+    owner, other = user_namespace("tenant-a"), user_namespace("tenant-b")
+    # Fake embeddings are hash-based: the query text itself is the nearest possible chunk
+    private = Document(page_content=QUERY, metadata={"type": "pdf", "source": "memo.pdf"})
+    try:
+        vector_store.add_documents([private], namespace=owner)
+
+        def sources(docs):
+            return {doc.metadata.get("source") for doc in docs}
+
+        assert "memo.pdf" in sources(vector_store.search(QUERY, k=5, namespaces=[owner]))
+        assert "memo.pdf" not in sources(vector_store.search(QUERY, k=5, namespaces=[other]))
+        assert "memo.pdf" not in sources(vector_store.search(QUERY, k=5))
+        by_batch = vector_store.search_batch([QUERY, QUERY], k=5, namespaces=[other])
+        assert all("memo.pdf" not in sources(docs) for docs in by_batch)
+        filtered = vector_store.search(QUERY, k=5, namespaces=[other], filters={"source": ["memo.pdf"]})
+        assert filtered == []
+    finally:
+        vector_store._namespaces.pop(owner, None)
+        vector_store._metadata.pop(owner, None)
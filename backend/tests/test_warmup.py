@@ -0,0 +1,11 @@
+from app.core.readiness import readiness
+from app.services import warmup
+from app.services.followup_service import followup_service
+
+def test_models_warmup_embeds_followup_questions(vector_store, agent):
+    followup_service._current().vectors = None
+
+    warmup._load_models()
+
+    assert readiness.is_ready("embedder")
+    assert followup_service._current().vectors is not None
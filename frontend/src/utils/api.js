@@ -73,14 +73,22 @@ async function retryRequest(requestFn, maxRetries = 3, initialDelay = 1000) {
  * Check if backend is awake and healthy
  */
 export async function checkBackendHealth() {
-    try {
-        const response = await axios.get(`${API_BASE_URL}/health/status`, {
-            timeout: 90000 // 90 seconds for cold start
-        });
-        return response.data;
-    } catch (error) {
-        console.error('Health check failed:', error);
-        return null;
+    const deadline = Date.now() + 90000; // 90 seconds for cold start
+    while (true) {
+        try {
+            const response = await axios.get(`${API_BASE_URL}/health/status`, {
+                timeout: 90000
+            });
+            return response.data;
+        } catch (error) {
+            // 503 while the backend is up but its models are still warming up
+            if (error.response?.status === 503 && Date.now() < deadline) {
+                await new Promise(resolve => setTimeout(resolve, 2000));
+                continue;
+            }
+            console.error('Health check failed:', error);
+            return null;
+        }
     }
 }
 